@@ -1,15 +1,15 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, abort, send_from_directory
+from flask import Flask, render_template, jsonify, request, redirect, url_for, abort, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 import os
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 from google.cloud import storage
 from google.oauth2 import service_account
 import json
-import requests
+import html as html_lib
 import hmac
 import hashlib
 import base64
@@ -17,13 +17,33 @@ from urllib.parse import quote, urlparse, unquote, parse_qs
 from io import BytesIO
 import re
 import boto3
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as futures_wait
+import threading
+import time
+import requests
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
 from botocore.client import Config
+from preview_cache import PreviewCache, canonical_product_url
+import scrape_http
+import scrape_jobs
+import preview_timing
+from bulkhead import Bulkhead, BulkheadFull
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from deadline import Deadline
+from fetch_all import fetch_all_rows
+import list_pages
+from list_pages import ListPage
+import price_refresh
+from product_cache import ProductCache
+import product_thumbs
+from tag_index import TagIndex, TagQuery, normalize_tag, row_tags
 
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=[list_pages.NEXT_CURSOR_HEADER])
 
 # Disable caching for static files
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
@@ -113,7 +133,7 @@ init_gcp_storage()
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def upload_to_supabase_storage_s3(file_content, file_path, content_type, bucket_name='image_hosting_bucket'):
+def upload_to_supabase_storage_s3(file_content, file_path, content_type, bucket_name='image_hosting_bucket', cache_control=None):
     if not SUPABASE_ACCESS_KEY_ID or not SUPABASE_SECRET_ACCESS_KEY:
         raise ValueError("Supabase storage access keys not configured")
 
@@ -134,11 +154,13 @@ def upload_to_supabase_storage_s3(file_content, file_path, content_type, bucket_
 
     file_obj = BytesIO(file_content)
     try:
+        extra = {'CacheControl': cache_control} if cache_control else {}
         s3_client.put_object(
             Bucket=bucket_name,
             Key=file_path,
             Body=file_obj,
-            ContentType=content_type
+            ContentType=content_type,
+            **extra
         )
         class MockResponse:
             status_code = 200
@@ -522,7 +544,7 @@ def _fetch_autotrader_car(url):
         'Accept': 'application/json',
     }
     try:
-        r = requests.get(api_url, headers=headers, timeout=18)
+        r = scrape_http.get(api_url, headers=headers, timeout=18)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
@@ -601,24 +623,30 @@ def car_preview():
         return jsonify({'error': 'Invalid URL'}), 400
     if 'autotrader.co.uk' not in url.lower():
         return jsonify({'error': 'Only Autotrader UK car-details links are supported for now'}), 400
+    return _scrape_response('car_preview', lambda: _car_preview_result(url), {'url': url})
+
+
+def _car_preview_result(url):
+    """(body, status) for /api/cars/preview; also run as a background scrape job."""
     data = _fetch_autotrader_car(url)
     if not data:
-        return jsonify({'error': 'Could not parse Autotrader URL'}), 400
-    return jsonify(data), 200
+        return {'error': 'Could not parse Autotrader URL'}, 400
+    return data, 200
 
 
 @app.route('/api/cars', methods=['GET'], strict_slashes=False)
 def get_cars():
-    """List cars from ha_cars. Optional query: status=."""
+    """List cars from ha_cars. Optional query: status=, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        query = supabase.table('ha_cars').select('*').order('created_at', desc=True)
+        page = _list_page('created_at', desc=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         status = (request.args.get('status') or '').strip()
-        if status:
-            query = query.eq('status', status)
-        r = query.execute()
-        return jsonify(r.data or []), 200
+        where = (lambda q: q.eq('status', status)) if status else None
+        return _list_response(_list_rows('ha_cars', page, where), page)
     except Exception as e:
         app.logger.error(f'Error fetching cars: {e}')
         return jsonify([]), 200
@@ -720,12 +748,15 @@ def delete_car(car_id):
 # --------- Jobs I've seen (Work page: ha_jobs_seen) ---------
 @app.route('/api/jobs-seen', methods=['GET'], strict_slashes=False)
 def get_jobs_seen():
-    """List all jobs seen from ha_jobs_seen."""
+    """List all jobs seen from ha_jobs_seen. Optional query: limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        r = supabase.table('ha_jobs_seen').select('*').order('created_at', desc=True).execute()
-        return jsonify(r.data or []), 200
+        page = _list_page('created_at', desc=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        return _list_response(_list_rows('ha_jobs_seen', page), page)
     except Exception as e:
         app.logger.error(f"Error fetching jobs seen: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1290,20 +1321,35 @@ def _normalize_image_url(img_url):
         return img_url
 
 
-def _amazon_image_from_soup(soup):
+_AMAZON_COLOR_IMAGES_RE = re.compile(rb'''colorImages['"]?\s*:\s*\{\s*['"]initial['"]\s*:\s*\[''')
+_AMAZON_GALLERY_IMAGE_RES = [
+    re.compile(rb'"hiRes"\s*:\s*"(https://[^"\\]+)"'),
+    re.compile(rb'"large"\s*:\s*"(https://[^"\\]+)"'),
+]
+
+
+def _amazon_color_images_hires(html_bytes):
+    """First hiRes (else large) URL of the inline colorImages gallery JSON, found by regex over the raw HTML."""
+    m = _AMAZON_COLOR_IMAGES_RE.search(html_bytes)
+    if not m:
+        return None
+    window = html_bytes[m.end():m.end() + 8192]
+    for pattern in _AMAZON_GALLERY_IMAGE_RES:
+        hit = pattern.search(window)
+        if hit:
+            return hit.group(1).decode('utf-8', errors='replace')
+    return None
+
+
+def _amazon_image_from_page(page):
     """Best-effort extraction of Amazon product image URL."""
     # Common metadata fallback first
-    meta_candidates = [
-        soup.find('meta', property='og:image:secure_url'),
-        soup.find('meta', attrs={'name': 'twitter:image'}),
-        soup.find('meta', attrs={'name': 'twitter:image:src'}),
-    ]
-    for tag in meta_candidates:
-        if tag and tag.get('content'):
-            return tag['content'].strip()
+    for key in ('og:image:secure_url', 'twitter:image', 'twitter:image:src'):
+        if page.meta.get(key):
+            return page.meta[key].strip()
 
     # Amazon product image element
-    landing = soup.find(id='landingImage')
+    landing = next((img for img in page.img_tags if img.get('id') == 'landingImage'), None)
     if landing:
         old_hires = (landing.get('data-old-hires') or '').strip()
         if old_hires:
@@ -1330,8 +1376,13 @@ def _amazon_image_from_soup(soup):
         if src:
             return src
 
+    # Inline image-block JSON ('colorImages': {'initial': [{"hiRes": ...}]}) when there is no landing image.
+    image = _amazon_color_images_hires(page.html_bytes)
+    if image:
+        return image
+
     # Additional fallback: any image with data-old-hires
-    img_with_old = soup.find('img', attrs={'data-old-hires': True})
+    img_with_old = next((img for img in page.img_tags if 'data-old-hires' in img), None)
     if img_with_old:
         old_hires = (img_with_old.get('data-old-hires') or '').strip()
         if old_hires:
@@ -1410,24 +1461,17 @@ def _json_ld_price_from_node(node):
     return None
 
 
-def _wayfair_extract_price(soup):
+def _wayfair_extract_price(page):
     """Wayfair PDP: prefer JSON-LD offer price, then '£sale RRP' pattern (avoid Klarna snippets)."""
-    for script in soup.find_all('script', type='application/ld+json'):
-        if not script.string or 'price' not in script.string.lower():
-            continue
-        try:
-            data = json.loads(script.string)
-        except Exception:
-            continue
-        for node in _walk_json_ld_nodes(data):
-            pr = _json_ld_price_from_node(node)
-            if pr:
-                pnorm = str(pr).strip()
-                if not pnorm.startswith('£'):
-                    pnorm = '£' + pnorm.lstrip('$').strip()
-                return re.sub(r'^£+', '£', pnorm)
+    for node in page.json_ld_nodes:
+        pr = _json_ld_price_from_node(node)
+        if pr:
+            pnorm = str(pr).strip()
+            if not pnorm.startswith('£'):
+                pnorm = '£' + pnorm.lstrip('$').strip()
+            return re.sub(r'^£+', '£', pnorm)
     try:
-        text = soup.get_text(' ', strip=True)
+        text = page.text
         m = re.search(r'£\s*([\d,]+(?:\.\d{2})?)\s+RRP\b', text, re.I)
         if m:
             return '£' + m.group(1).replace(',', '')
@@ -1449,13 +1493,13 @@ def _wayfair_extract_price(soup):
     return None
 
 
-def _wayfair_primary_image_from_soup(soup, page_url):
+def _wayfair_primary_image_from_page(page):
     """Pick a main product image when og:image is missing (common for some Wayfair responses)."""
     try:
-        base_host = (urlparse(page_url).netloc or '').lower()
+        base_host = page.host
         best = None
         best_area = 0
-        for img in soup.find_all('img'):
+        for img in page.img_tags:
             src = (img.get('src') or img.get('data-src') or img.get('data-lazy-src') or '').strip()
             if not src or src.startswith('data:'):
                 continue
@@ -1480,30 +1524,23 @@ def _wayfair_primary_image_from_soup(soup, page_url):
         return None
 
 
-def _hulalahome_extract_price(soup):
+def _hulalahome_extract_price(page):
     """Hulala Home PDP: extract the main product price (avoid cart header £0.00, etc)."""
     # JSON-LD often has the cleanest `offers.price`
     try:
         candidates = []
-        for script in soup.find_all('script', type='application/ld+json'):
-            if not script.string:
-                continue
-            try:
-                data = json.loads(script.string)
-            except Exception:
-                continue
-            for node in _walk_json_ld_nodes(data):
-                if isinstance(node, dict) and 'price' in node:
-                    p = node.get('price')
-                    if p is None:
-                        continue
-                    try:
-                        val = float(str(p).replace(',', '').strip())
-                    except Exception:
-                        continue
-                    # Avoid header/placeholder values like 0.00; keep reasonable price range.
-                    if val > 1 and val < 100000:
-                        candidates.append(val)
+        for node in page.json_ld_nodes:
+            if isinstance(node, dict) and 'price' in node:
+                p = node.get('price')
+                if p is None:
+                    continue
+                try:
+                    val = float(str(p).replace(',', '').strip())
+                except Exception:
+                    continue
+                # Avoid header/placeholder values like 0.00; keep reasonable price range.
+                if val > 1 and val < 100000:
+                    candidates.append(val)
         if candidates:
             # Hulala pages typically show just one product price in JSON-LD; take max as a safe default.
             return '£' + str(max(candidates)).rstrip('0').rstrip('.') if '.' in str(max(candidates)) else '£' + str(max(candidates))
@@ -1512,7 +1549,7 @@ def _hulalahome_extract_price(soup):
 
     # Fallback: find all £xx.xx, but ignore small/placeholder and payment snippets.
     try:
-        text = soup.get_text(' ', strip=True)
+        text = page.text
         matches = list(re.finditer(r'£\s*([\d,]+(?:\.\d{2})?)', text))
         best = None
         for m in matches:
@@ -1541,38 +1578,29 @@ def _hulalahome_extract_price(soup):
     return None
 
 
-def _made_extract_price(soup):
+def _made_extract_price(page):
     """MADE.com: extract product price from JSON-LD/meta, fallback to text scan."""
     # JSON-LD first (Product/Offer)
     try:
-        for script in soup.find_all('script', type='application/ld+json'):
-            if not script.string or 'price' not in script.string.lower():
-                continue
-            try:
-                data = json.loads(script.string)
-            except Exception:
-                continue
-            for node in _walk_json_ld_nodes(data):
-                pr = _json_ld_price_from_node(node)
-                if pr:
-                    pnorm = str(pr).strip()
-                    if not pnorm.startswith('£') and re.search(r'^\d', pnorm):
-                        pnorm = '£' + pnorm
-                    return re.sub(r'^£+', '£', pnorm)
+        for node in page.json_ld_nodes:
+            pr = _json_ld_price_from_node(node)
+            if pr:
+                pnorm = str(pr).strip()
+                if not pnorm.startswith('£') and re.search(r'^\d', pnorm):
+                    pnorm = '£' + pnorm
+                return re.sub(r'^£+', '£', pnorm)
     except Exception:
         pass
 
     # Meta tags sometimes include price
     try:
         for name in ('product:price:amount', 'og:price:amount'):
-            tag = soup.find('meta', property=name)
-            if tag and tag.get('content'):
-                amt = tag['content'].strip()
-                if amt and re.match(r'^\d+(\.\d{1,2})?$', amt):
-                    return '£' + amt
-        tag = soup.find('meta', attrs={'name': 'twitter:data1'})
-        if tag and tag.get('content') and '£' in tag['content']:
-            m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', tag['content'])
+            amt = (page.meta.get(name) or '').strip()
+            if amt and re.match(r'^\d+(\.\d{1,2})?$', amt):
+                return '£' + amt
+        data1 = page.meta.get('twitter:data1') or ''
+        if '£' in data1:
+            m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', data1)
             if m:
                 return m.group(0).replace('£ ', '£')
     except Exception:
@@ -1580,7 +1608,7 @@ def _made_extract_price(soup):
 
     # Last resort: scan visible text for plausible £ amounts
     try:
-        text = soup.get_text(' ', strip=True)
+        text = page.text
         for m in re.finditer(r'£\s*([\d,]+)(?:\.(\d{2}))?', text):
             whole = (m.group(1) or '').replace(',', '')
             dec = m.group(2) or '00'
@@ -1595,23 +1623,17 @@ def _made_extract_price(soup):
     return None
 
 
-def _tkmaxx_extract_price(soup):
+def _tkmaxx_extract_price(page):
     """TK Maxx UK PDP: sale price near the product (avoid nav 'over £50' and delivery fees)."""
+    soup = page.soup
     try:
-        for script in soup.find_all('script', type='application/ld+json'):
-            if not script.string or 'price' not in script.string.lower():
-                continue
-            try:
-                data = json.loads(script.string)
-            except Exception:
-                continue
-            for node in _walk_json_ld_nodes(data):
-                pr = _json_ld_price_from_node(node)
-                if pr:
-                    pnorm = str(pr).strip()
-                    if not pnorm.startswith('£') and re.search(r'^\d', pnorm):
-                        pnorm = '£' + pnorm
-                    return re.sub(r'^£+', '£', pnorm)
+        for node in page.json_ld_nodes:
+            pr = _json_ld_price_from_node(node)
+            if pr:
+                pnorm = str(pr).strip()
+                if not pnorm.startswith('£') and re.search(r'^\d', pnorm):
+                    pnorm = '£' + pnorm
+                return re.sub(r'^£+', '£', pnorm)
     except Exception:
         pass
 
@@ -1643,11 +1665,9 @@ def _tkmaxx_extract_price(soup):
     # Meta / microdata
     try:
         for prop in ('product:price:amount', 'og:price:amount'):
-            tag = soup.find('meta', property=prop)
-            if tag and tag.get('content'):
-                amt = tag['content'].strip().replace(',', '')
-                if amt and re.match(r'^\d+(\.\d{1,2})?$', amt):
-                    return '£' + amt
+            amt = (page.meta.get(prop) or '').strip().replace(',', '')
+            if amt and re.match(r'^\d+(\.\d{1,2})?$', amt):
+                return '£' + amt
         ip = soup.find(attrs={'itemprop': 'price'})
         if ip and ip.get('content'):
             c = str(ip['content']).strip().replace(',', '')
@@ -1724,7 +1744,7 @@ def _tkmaxx_extract_price(soup):
 
     # Fallback: scan page text, skip obvious delivery / promo lines
     try:
-        text = soup.get_text(' ', strip=True)
+        text = page.text
         for m in re.finditer(r'£\s*([\d,]+(?:\.\d{2})?)', text):
             sn = text[max(0, m.start() - 50):min(len(text), m.end() + 50)].lower()
             if _snippet_bad_delivery(sn) or _snippet_bad_promo(sn):
@@ -1741,43 +1761,30 @@ def _tkmaxx_extract_price(soup):
     return None
 
 
-def _tkmaxx_image_from_soup(soup):
+def _tkmaxx_image_from_page(page):
     """Best-effort main product image for TK Maxx PDP."""
     try:
-        for script in soup.find_all('script', type='application/ld+json'):
-            if not script.string or 'image' not in script.string.lower():
+        for node in page.json_ld_nodes:
+            if not isinstance(node, dict):
                 continue
-            try:
-                data = json.loads(script.string)
-            except Exception:
+            typ = node.get('@type')
+            types = {str(t) for t in (typ if isinstance(typ, list) else [typ]) if t}
+            if 'Product' not in types and 'ProductGroup' not in types:
                 continue
-            for node in _walk_json_ld_nodes(data):
-                if not isinstance(node, dict):
-                    continue
-                typ = node.get('@type')
-                types = typ if isinstance(typ, list) else ([typ] if typ else [])
-                if 'Product' not in {str(t) for t in types if t} and 'ProductGroup' not in {str(t) for t in types if t}:
-                    continue
-                img = node.get('image')
-                if isinstance(img, str) and img.startswith('http'):
-                    return img
-                if isinstance(img, list) and img and isinstance(img[0], str):
-                    return img[0]
-                if isinstance(img, dict) and img.get('url'):
-                    return img['url']
-    except Exception:
-        pass
-    try:
-        og = soup.find('meta', property='og:image')
-        if og and og.get('content'):
-            return og['content'].strip()
-        tw = soup.find('meta', attrs={'name': 'twitter:image'})
-        if tw and tw.get('content'):
-            return tw['content'].strip()
+            img = node.get('image')
+            if isinstance(img, str) and img.startswith('http'):
+                return img
+            if isinstance(img, list) and img and isinstance(img[0], str):
+                return img[0]
+            if isinstance(img, dict) and img.get('url'):
+                return img['url']
     except Exception:
         pass
+    for key in ('og:image', 'twitter:image'):
+        if page.meta.get(key):
+            return page.meta[key].strip()
     try:
-        for img in soup.find_all('img'):
+        for img in page.soup.find_all('img'):
             src = (img.get('src') or img.get('data-src') or img.get('data-lazy-src') or '').strip()
             if not src or src.startswith('data:'):
                 continue
@@ -1823,45 +1830,178 @@ def _tkmaxx_html_has_product_signals(html):
     return False
 
 
-def _tkmaxx_fetch_product_soup(url):
+def _preview_html_parser():
+    """lxml (C parser, much faster on multi-MB PDPs) when installed, else html.parser; PREVIEW_HTML_PARSER overrides."""
+    for name in ((os.getenv('PREVIEW_HTML_PARSER') or '').strip(), 'lxml'):
+        if name and builder_registry.lookup(name):
+            return name
+    return 'html.parser'
+
+
+PREVIEW_HTML_PARSER = _preview_html_parser()
+
+
+def _make_soup(html):
+    """BeautifulSoup for a scraped product page, using the fastest available parser backend."""
+    return BeautifulSoup(html, PREVIEW_HTML_PARSER)
+
+
+TKMAXX_FETCH_UAS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
+    'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+)
+# Overall budget for one TK Maxx page fetch, and the stagger before launching the next UA attempt.
+TKMAXX_FETCH_DEADLINE = float(os.getenv('TKMAXX_FETCH_DEADLINE', '25'))
+TKMAXX_HEDGE_DELAY = float(os.getenv('TKMAXX_HEDGE_DELAY', '1.5'))
+# Seconds the homepage warm-up cookies are reused before warming up again.
+TKMAXX_COOKIE_TTL = float(os.getenv('TKMAXX_COOKIE_TTL', '900'))
+
+_tkmaxx_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='tkmaxx-fetch')
+_tkmaxx_warm_lock = threading.Lock()
+_tkmaxx_warm_cookies = None
+_tkmaxx_warm_at = 0.0
+
+
+def _tkmaxx_cookies(headers, deadline):
+    """Homepage cookies from a warm-up GET (Akamai is friendlier with them), reused for TKMAXX_COOKIE_TTL.
+
+    None if the warm-up failed, was blocked or set no cookies; that is not cached, the next fetch warms up again.
+    """
+    global _tkmaxx_warm_cookies, _tkmaxx_warm_at
+    with _tkmaxx_warm_lock:
+        if _tkmaxx_warm_cookies is not None and time.monotonic() - _tkmaxx_warm_at < TKMAXX_COOKIE_TTL:
+            return _tkmaxx_warm_cookies
+        _tkmaxx_warm_cookies = None
+        timeout = min(8.0, deadline - time.monotonic() - 2.0)
+        if timeout < 1.0:
+            return None
+        try:
+            r = scrape_http.get('https://www.tkmaxx.com/', headers=headers, timeout=timeout, stream=True)
+            r.close()
+        except Exception:
+            return None
+        if r.status_code >= 400 or not r.cookies:
+            return None
+        _tkmaxx_warm_cookies = r.cookies
+        _tkmaxx_warm_at = time.monotonic()
+        return _tkmaxx_warm_cookies
+
+
+def _tkmaxx_drop_cookies(cookies):
+    """Forget the warm-up jar after a race it did not help (the next fetch warms up again)."""
+    global _tkmaxx_warm_cookies
+    with _tkmaxx_warm_lock:
+        if cookies is not None and _tkmaxx_warm_cookies is cookies:
+            _tkmaxx_warm_cookies = None
+
+
+def _decode_page_body(r, body):
+    try:
+        return body.decode(r.encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def _tkmaxx_fetch_attempt(url, headers, cookies, timeout, cancel, responses):
+    """One UA attempt: (text, usable, has_product_signals); never raises.
+
+    The body is streamed under the PREVIEW_MAX_BYTES cap. Once cancel is set (another attempt won) the read
+    stops; the response is added to responses so the race can abort it while it is still downloading.
+    """
+    if cancel.is_set():
+        return '', False, False
+    try:
+        r = scrape_http.get(url, headers=headers, cookies=cookies, timeout=timeout, stream=True)
+    except Exception:
+        return '', False, False
+    responses.append(r)
+    try:
+        if cancel.is_set():
+            return '', False, False
+        body, _ = _read_page_body(r, True, cancel=cancel)
+    except Exception:
+        return '', False, False
+    finally:
+        r.close()
+    if cancel.is_set():
+        return '', False, False
+    text = _decode_page_body(r, body)
+    if _tkmaxx_is_placeholder_or_block_html(text):
+        return text, False, False
+    signals = _tkmaxx_html_has_product_signals(text)
+    return text, signals or r.status_code < 400, signals
+
+
+def _tkmaxx_fetch_product_soup(url, deadline=None):
     """
     TK Maxx often responds 403 to the default UA while still sending a placeholder HTML body.
-    Try several UAs; do not use raise_for_status so we can inspect the body.
+    Race several UAs (each launched TKMAXX_HEDGE_DELAY after the previous one) and take the first
+    body with product signals; do not use raise_for_status so we can inspect the body.
+    deadline is a time.monotonic() timestamp; defaults to TKMAXX_FETCH_DEADLINE from now.
     """
-    attempts = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
-        'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
-        'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
-    ]
+    if deadline is None:
+        deadline = time.monotonic() + TKMAXX_FETCH_DEADLINE
     headers_base = {
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         'Accept-Language': 'en-GB,en;q=0.9',
         'Referer': 'https://www.tkmaxx.com/',
     }
-    session = requests.Session()
+    cookies = _tkmaxx_cookies({**headers_base, 'User-Agent': TKMAXX_FETCH_UAS[0]}, deadline)
+    cancel = threading.Event()
+    responses = []
+    pending = {}
+    results = {}
+    next_attempt = 0
+    next_launch = time.monotonic()
+    winner = None
     try:
-        warm_h = {
-            **headers_base,
-            'User-Agent': attempts[0],
-        }
-        session.get('https://www.tkmaxx.com/', headers=warm_h, timeout=18, allow_redirects=True)
-    except Exception:
-        pass
-    for ua in attempts:
-        h = {**headers_base, 'User-Agent': ua}
-        try:
-            timeout = 25 if 'facebook' in ua.lower() or 'googlebot' in ua.lower() else 22
-            r = session.get(url, headers=h, timeout=timeout, allow_redirects=True)
-        except Exception:
-            continue
-        text = r.text or ''
-        if _tkmaxx_is_placeholder_or_block_html(text):
-            continue
-        if r.status_code >= 400 and not _tkmaxx_html_has_product_signals(text):
-            continue
-        return BeautifulSoup(text, 'html.parser')
-    return None
+        while winner is None:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if next_attempt < len(TKMAXX_FETCH_UAS) and now >= next_launch:
+                h = {**headers_base, 'User-Agent': TKMAXX_FETCH_UAS[next_attempt]}
+                future = _tkmaxx_executor.submit(
+                    _tkmaxx_fetch_attempt, url, h, cookies, max(1.0, deadline - now), cancel, responses,
+                )
+                pending[future] = next_attempt
+                next_attempt += 1
+                next_launch = now + TKMAXX_HEDGE_DELAY
+            if not pending:
+                if next_attempt >= len(TKMAXX_FETCH_UAS):
+                    break
+                time.sleep(max(0.0, min(next_launch, deadline) - time.monotonic()))
+                continue
+            wait_until = deadline if next_attempt >= len(TKMAXX_FETCH_UAS) else min(next_launch, deadline)
+            done, _ = futures_wait(pending, timeout=max(0.0, wait_until - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                text, usable, signals = future.result()
+                if signals:
+                    winner = text
+                    break
+                if usable:
+                    results[index] = text
+    finally:
+        # Drop attempts not yet started and stop the in-flight ones: their reads see cancel between chunks,
+        # and aborting the responses fails a read blocked on the socket.
+        cancel.set()
+        for future in pending:
+            future.cancel()
+        for r in list(responses):
+            scrape_http.abort(r)
+    if winner is None:
+        # Blocked, failed or out of time: the cookies may be part of the problem, so warm up afresh next time.
+        _tkmaxx_drop_cookies(cookies)
+    if winner is None and results:
+        # Nothing had product markup; keep the old behaviour of taking the first usable response by UA order.
+        winner = results[min(results)]
+    if winner is None:
+        return None
+    with preview_timing.stage('parse'):
+        return _make_soup(winner)
 
 
 def _temu_title_from_path(path):
@@ -1919,19 +2059,23 @@ def _temu_preview_from_url(url):
     return out
 
 
-def _temu_images_from_html(html_text):
-    """Find product gallery URLs in Temu page HTML (often JS-rendered)."""
-    if not html_text:
+_TEMU_IMAGE_PATTERNS = [
+    re.compile(rb'''https://img[a-z0-9-]*\.kwcdn\.com/local-goods-img/[^\s"'<>\\]+''', re.I),
+    re.compile(rb'''https://img[a-z0-9-]*\.kwcdn\.com/goods-img/[^\s"'<>\\]+''', re.I),
+    re.compile(rb'''https://img[a-z0-9-]*\.kwcdn\.com/[^\s"'<>\\]+\.(?:jpe?g|webp|png)''', re.I),
+]
+
+
+def _temu_images_from_html(html):
+    """Find product gallery URLs in Temu page HTML (often JS-rendered); html may be the raw response bytes."""
+    if not html:
         return None
+    if isinstance(html, str):
+        html = html.encode('utf-8')
     skip = ('logo', 'avatar', 'icon', 'sprite', 'placeholder', 'blank', 'loading')
-    patterns = [
-        r'https://img[a-z0-9-]*\.kwcdn\.com/local-goods-img/[^\s"\'<>\\]+',
-        r'https://img[a-z0-9-]*\.kwcdn\.com/goods-img/[^\s"\'<>\\]+',
-        r'https://img[a-z0-9-]*\.kwcdn\.com/[^\s"\'<>\\]+\.(?:jpe?g|webp|png)',
-    ]
-    for pattern in patterns:
-        for match in re.finditer(pattern, html_text, re.I):
-            candidate = match.group(0).rstrip('\\')
+    for pattern in _TEMU_IMAGE_PATTERNS:
+        for match in pattern.finditer(html):
+            candidate = match.group(0).decode('utf-8', errors='replace').rstrip('\\')
             lower = candidate.lower()
             if any(token in lower for token in skip):
                 continue
@@ -1939,16 +2083,10 @@ def _temu_images_from_html(html_text):
     return None
 
 
-def _price_from_json_ld_scripts(soup):
-    """Extract a display price from JSON-LD Product nodes."""
+def _price_from_json_ld(page):
+    """Extract a display price from top-level JSON-LD Product / Offer nodes."""
     try:
-        for script in soup.find_all('script', type='application/ld+json'):
-            if not script.string:
-                continue
-            try:
-                data = json.loads(script.string)
-            except Exception:
-                continue
+        for data in page.json_ld:
             nodes = data if isinstance(data, list) else [data]
             for node in nodes:
                 if not isinstance(node, dict):
@@ -2000,457 +2138,573 @@ def _auction_gbp_estimate_from_text(text):
     return None
 
 
-def _fetch_product_preview(url):
-    """Fetch a URL and extract title, image_url, website_name, price. Returns dict (at least title from URL + website_name)."""
-    if not url or not url.startswith(('http://', 'https://')):
-        return None
-    out = {}
-    # Always set website_name and URL-derived title so we have something even when fetch fails
-    out['website_name'] = _website_name_from_url(url)
-    url_title = _title_from_url(url)
-    if url_title:
-        out['title'] = url_title
+# ---------- Product preview: per-retailer extractors ----------
 
-    host = (urlparse(url).netloc or '').lower()
+DEFAULT_BROWSER_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+SOCIAL_CRAWLER_UA = 'facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)'
+GOOGLEBOT_UA = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
 
-    if 'temu.com' in host:
-        for key, val in _temu_preview_from_url(url).items():
-            if val and not out.get(key):
-                out[key] = val
+# Two-label public suffixes seen in retailer links (amazon.co.uk, carousell.com.hk, ...).
+_MULTI_LABEL_SUFFIXES = {
+    'co.uk', 'org.uk', 'me.uk', 'com.hk', 'com.au', 'com.sg', 'com.my', 'com.tw', 'co.jp', 'co.nz',
+}
 
-    def _do_fetch(user_agent=None, timeout=None):
-        headers = {
-            'User-Agent': user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-GB,en;q=0.9',
-        }
-        wait = timeout if timeout is not None else (22 if 'tkmaxx' in host else 10)
-        r = requests.get(url, headers=headers, timeout=wait, allow_redirects=True)
-        r.raise_for_status()
-        return BeautifulSoup(r.text, 'html.parser')
 
-    try:
-        if 'tkmaxx' in host:
-            soup = _tkmaxx_fetch_product_soup(url)
-            if soup is None:
-                app.logger.warning(
-                    'Product preview: TK Maxx returned no usable PDP (bot block / placeholder) for %s',
-                    url[:120],
-                )
-                return out if out.get('title') or out.get('website_name') else None
-        else:
-            soup = _do_fetch()
-    except Exception as e:
-        app.logger.warning(f"Product preview fetch failed for {url[:80]}: {e}")
-        # Retry with a different User-Agent for known retailers (sometimes returns different HTML)
-        retry_domains = (
-            'amazon', 'habitat', 'ikea', 'wayfair', 'hulalahome', 'made.com', 'made', 'tkmaxx', 'hm.com',
-            'the-saleroom.com', 'saleroom.com', 'etsy.com', 'temu.com',
-        )
-        if any(d in url.lower() for d in retry_domains):
+def _registered_domain_label(host):
+    """Registered-domain label of a host: 'www.amazon.co.uk' -> 'amazon', 'hm.com' -> 'hm'."""
+    parts = [p for p in (host or '').lower().split(':')[0].split('.') if p]
+    if len(parts) >= 3 and '.'.join(parts[-2:]) in _MULTI_LABEL_SUFFIXES:
+        return parts[-3]
+    if len(parts) >= 2:
+        return parts[-2]
+    return parts[0] if parts else ''
+
+
+class _ProductPage:
+    """A fetched product page, shared by every extraction step of one preview.
+
+    The JSON-LD, meta and text views are computed on first use and cached, so the
+    page is scanned once however many extractor steps ask for them.
+    """
+
+    def __init__(self, url, soup, deadline=None, truncated=False, raw=None):
+        self.url = url
+        self.host = (urlparse(url).netloc or '').lower()
+        self.soup = soup
+        # Response body as received (bytes), for regex lookups that must not re-serialise the soup.
+        self.raw = raw
+        # True when reading stopped before EOF was seen (byte cap, deadline, or early stop after the head).
+        self.truncated = truncated
+        # The preview's Deadline, which also bounds follow-up fetches made while extracting this page.
+        self.deadline = deadline
+
+    @cached_property
+    def json_ld(self):
+        """Decoded payload of every application/ld+json script; undecodable scripts are skipped."""
+        payloads = []
+        for script in self.soup.find_all('script', type='application/ld+json'):
+            if not script.string:
+                continue
             try:
-                soup = _do_fetch(user_agent='Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)')
-            except Exception as e2:
-                app.logger.warning(f"Product preview retry failed: {e2}")
-                return out if out.get('title') or out.get('website_name') else None
-        else:
-            return out if out.get('title') or out.get('website_name') else None
+                payloads.append(json.loads(script.string))
+            except Exception:
+                continue
+        return payloads
+
+    @cached_property
+    def json_ld_nodes(self):
+        """Every dict node in the JSON-LD payloads (top level, lists and @graph)."""
+        return [node for data in self.json_ld for node in _walk_json_ld_nodes(data)]
+
+    @cached_property
+    def meta(self):
+        """<meta> content keyed by property / name (og:*, twitter:*, product:price:*); first tag wins."""
+        out = {}
+        for tag in self.soup.find_all('meta'):
+            content = tag.get('content')
+            if content is None:
+                continue
+            for key in (tag.get('property'), tag.get('name')):
+                if key and key not in out:
+                    out[key] = content
+        return out
+
+    @cached_property
+    def text(self):
+        """Page text joined with spaces and stripped, as used by the price scans."""
+        return self.soup.get_text(' ', strip=True)
+
+    @cached_property
+    def plain_text(self):
+        """Raw concatenated page text (soup.get_text())."""
+        return self.soup.get_text()
+
+    @cached_property
+    def html_bytes(self):
+        """The page HTML as bytes: the raw body when the fetch kept it, else the serialised soup."""
+        if self.raw is not None:
+            return self.raw
+        return str(self.soup).encode('utf-8')
+
+    @cached_property
+    def img_tags(self):
+        """Attributes (lower-case names, entity-decoded values) of every <img> tag in document order.
+
+        Read with a regex over html_bytes: much cheaper than soup.find_all('img') over the whole tree.
+        """
+        tags = []
+        for m in _RAW_IMG_TAG_RE.finditer(self.html_bytes):
+            attrs = {}
+            for name, dq, sq, bare in _RAW_ATTR_RE.findall(m.group(1)):
+                key = name.decode('latin-1').lower()
+                if key not in attrs:
+                    attrs[key] = html_lib.unescape((dq or sq or bare).decode('utf-8', errors='replace'))
+            tags.append(attrs)
+        return tags
+
+
+_RAW_IMG_TAG_RE = re.compile(rb'<img\b([^>]*)>', re.I)
+_RAW_ATTR_RE = re.compile(rb'''([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?''')
+
+
+# Product pages are streamed: never more than PREVIEW_MAX_BYTES is read, and extractors that only need
+# the <head> and JSON-LD (full_body = False) stop as soon as those have arrived.
+PREVIEW_MAX_BYTES = int(os.getenv('PREVIEW_MAX_BYTES', str(3 * 1024 * 1024)))
+_PREVIEW_CHUNK_BYTES = 64 * 1024
+
+
+def _has_preview_head_signals(low):
+    """True once (lower-cased) HTML has a closed <head> with og:title/og:image and a closed JSON-LD block mentioning a price."""
+    if b'</head>' not in low or b'og:title' not in low or b'og:image' not in low:
+        return False
+    start = low.find(b'application/ld+json')
+    while start != -1:
+        end = low.find(b'</script>', start)
+        if end == -1:
+            return False
+        if b'"price"' in low[start:end]:
+            return True
+        start = low.find(b'application/ld+json', end)
+    return False
+
+
+def _read_page_body(r, full_body, deadline=None, cancel=None):
+    """(bytes, truncated) read from a streamed response, capped at PREVIEW_MAX_BYTES and the deadline.
+
+    cancel is an optional threading.Event checked between chunks (a hedged attempt that lost the race).
+    """
+    chunks = []
+    low = b''
+    size = 0
+    for chunk in r.iter_content(chunk_size=_PREVIEW_CHUNK_BYTES):
+        if cancel is not None and cancel.is_set():
+            return b''.join(chunks), True
+        if not chunk:
+            continue
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= PREVIEW_MAX_BYTES:
+            return b''.join(chunks)[:PREVIEW_MAX_BYTES], True
+        if deadline is not None and deadline.expired():
+            # A slow drip-fed body: extract from what has arrived rather than overrun the budget.
+            deadline.cut_short = True
+            return b''.join(chunks), True
+        if not full_body:
+            low += chunk.lower()
+            if _has_preview_head_signals(low):
+                return b''.join(chunks), True
+    return b''.join(chunks), False
+
+
+def _fetch_product_page(url, user_agent=None, timeout=10, full_body=True, deadline=None, validators=None):
+    """_ProductPage for url. validators (price_refresh.PageValidators) make it a conditional GET: the response
+    is recorded in them and a 304 raises price_refresh.PageNotModified.
+    """
+    headers = {
+        'User-Agent': user_agent or DEFAULT_BROWSER_UA,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-GB,en;q=0.9',
+    }
+    if validators is not None:
+        headers.update(validators.request_headers())
+    # connect = DNS/TCP/TLS up to the response headers; download = streaming the body.
+    with preview_timing.stage('connect'):
+        r = scrape_http.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        if validators is not None:
+            validators.record(r.status_code, r.headers)
+            if validators.not_modified:
+                raise price_refresh.PageNotModified(url)
+        r.raise_for_status()
+        with preview_timing.stage('download'):
+            body, truncated = _read_page_body(r, full_body, deadline)
+    finally:
+        # Stopping early closes the socket instead of draining a multi-MB body back into the pool.
+        r.close()
+    html = _decode_page_body(r, body)
+    with preview_timing.stage('parse'):
+        soup = _make_soup(html)
+    return _ProductPage(url, soup, deadline=deadline, truncated=truncated, raw=body)
+
+
+def _meta_image_fallback(page):
+    """og:image:secure_url / twitter:image content when og:image is missing."""
+    for key in ('og:image:secure_url', 'twitter:image', 'twitter:image:src'):
+        if page.meta.get(key):
+            return page.meta[key]
+    return None
+
+
+def _first_gbp_in_text(page):
+    """First '£12.34' style amount in the page text."""
+    m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', page.plain_text)
+    return m.group(0).strip() if m else None
+
+
+def _json_ld_product_offer_price(page):
+    """Price of the first top-level JSON-LD Product with offers (Habitat, IKEA, Dunelm)."""
+    for data in page.json_ld:
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            if not isinstance(item, dict) or item.get('@type') != 'Product':
+                continue
+            off = item.get('offers')
+            if isinstance(off, list) and off:
+                off = off[0]
+            if isinstance(off, dict) and off.get('price') is not None:
+                pv = str(off['price'])
+                return pv if pv.startswith('£') else '£' + pv
+    return None
+
+
+class _PreviewExtractor:
+    """Generic preview extraction: Open Graph title/image, a JSON-LD offer price, else the first £/$ amount on the page.
+
+    Retailer subclasses register with ``@_register_extractor`` and list the registered-domain
+    labels they handle in ``domains`` (``amazon`` covers amazon.co.uk, amazon.com, ...).
+    Only the hooks of the extractor selected for a URL run for that preview.
+    """
+
+    domains = ()
+    fetch_timeout = 10
+    # Hooks read the page body (img tags, inline scripts, price text). When False the fetch may
+    # stop once the head and a JSON-LD price have been streamed.
+    full_body = False
+    # User agent for a second attempt when the first fetch raises (bot walls, 403s).
+    retry_user_agent = None
+
+    @property
+    def name(self):
+        """Retailer tag used for timings: the first domain label, or 'generic'."""
+        return self.domains[0] if self.domains else 'generic'
+
+    def seed(self, url, out):
+        """Fill fields derivable from the URL alone, before anything is fetched."""
+
+    def fetch_page(self, url, fetch, deadline):
+        """Return the page to extract from, or None when the retailer served nothing usable."""
+        return fetch()
 
-    # H&M frequently blocks server-side fetches (Akamai / bot protection).
-    # Detect it and return a usable fallback + signal to the UI.
-    if 'hm.com' in host:
+    def is_blocked(self, page, out):
+        """True when the page is a bot wall; ``out`` is returned as-is."""
+        return False
+
+    def enrich(self, page, out, fetch):
+        """Optionally swap in a richer page (e.g. re-fetched with a social-crawler UA)."""
+        return page
+
+    def clean_title(self, title):
+        return title
+
+    def fallback_image(self, page, out, fetch):
+        """Image URL for pages whose og/twitter meta tags gave none."""
+        return None
+
+    def extract_price(self, page, out):
+        """Retailer-specific price; may also fill title, category or image in ``out``."""
+        return _price_from_json_ld(page)
+
+
+_PREVIEW_EXTRACTORS = {}
+_GENERIC_EXTRACTOR = _PreviewExtractor()
+
+
+def _register_extractor(cls):
+    extractor = cls()
+    for label in cls.domains:
+        _PREVIEW_EXTRACTORS[label] = extractor
+    return cls
+
+
+def _preview_extractor_for(url):
+    label = _registered_domain_label(urlparse(url).netloc)
+    return _PREVIEW_EXTRACTORS.get(label, _GENERIC_EXTRACTOR)
+
+
+@_register_extractor
+class _AmazonExtractor(_PreviewExtractor):
+    domains = ('amazon',)
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def fallback_image(self, page, out, fetch):
+        image = _amazon_image_from_page(page)
+        if image:
+            return image
+        # Some Amazon pages return a "continue shopping" shell for normal UAs.
+        # A social-crawler UA frequently exposes og:image reliably.
         try:
-            title_tag = soup.find('title')
-            title_text = (title_tag.get_text() or '').strip().lower() if title_tag else ''
-            page_text = (soup.get_text(' ', strip=True) or '').strip().lower()
-            if 'access denied' in title_text or ('access denied' in page_text and 'permission to access' in page_text):
-                out['blocked'] = True
-                out['blocked_reason'] = 'H&M blocks automated previews; please fill manually.'
-                return out
+            social = fetch(user_agent=SOCIAL_CRAWLER_UA)
+            return social.meta.get('og:image') or _meta_image_fallback(social) or _amazon_image_from_page(social)
         except Exception:
-            pass
-
-    # Some retailers (incl. MADE) expose richer OG data to social-crawler UAs.
-    # Only do this when we haven't got a price yet (price is extracted later) and og tags are thin.
-    try:
-        if ('made.com' in host) and (not soup.find('meta', property='og:image') or not soup.find('meta', property='og:title')):
-            social_soup = _do_fetch(user_agent='facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)')
-            # Merge OG title/image if missing
-            if not soup.find('meta', property='og:title'):
-                ogt = social_soup.find('meta', property='og:title')
-                if ogt and ogt.get('content') and not out.get('title'):
-                    out['title'] = ogt['content'].strip()
-            if not soup.find('meta', property='og:image'):
-                ogi = social_soup.find('meta', property='og:image')
-                if ogi and ogi.get('content') and not out.get('image_url'):
-                    out['image_url'] = _normalize_image_url(ogi['content'])
-            # Keep the richer soup for price parsing too
-            soup = social_soup or soup
-    except Exception:
-        pass
+            return None
 
-    # TK Maxx: initial HTML is often a thin shell; social/crawler UAs get full OG tags and product markup.
-    if 'tkmaxx' in host:
+    def extract_price(self, page, out):
         try:
-            plain_len = len(soup.get_text())
-            has_og_img = bool(soup.find('meta', property='og:image'))
-            if not has_og_img or plain_len < 1200:
-                social_soup = _do_fetch(
-                    user_agent='facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
-                    timeout=25,
-                )
-                slen = len(social_soup.get_text())
-                if social_soup.find('meta', property='og:image') or slen > plain_len + 300:
-                    soup = social_soup
-            if len(soup.get_text()) < 800:
-                bot_soup = _do_fetch(
-                    user_agent='Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
-                    timeout=25,
-                )
-                if len(bot_soup.get_text()) > len(soup.get_text()) + 200:
-                    soup = bot_soup
+            for data in page.json_ld:
+                if isinstance(data, dict) and data.get('@type') == 'Product' and 'offers' in data:
+                    off = data['offers']
+                    price = None
+                    if isinstance(off, dict) and 'price' in off:
+                        price = str(off.get('price', ''))
+                    elif isinstance(off, list) and off and 'price' in off[0]:
+                        price = str(off[0]['price'])
+                    if price:
+                        return price
+            return _first_gbp_in_text(page)
         except Exception:
-            pass
+            return None
 
-    # Open Graph / generic meta
-    og_title = soup.find('meta', property='og:title')
-    if og_title and og_title.get('content'):
-        out['title'] = og_title['content'].strip()
-    if 'wayfair' in host and out.get('title'):
-        cleaned = _wayfair_clean_title(out['title'])
-        if cleaned:
-            out['title'] = cleaned
-    og_image = soup.find('meta', property='og:image')
-    if og_image and og_image.get('content'):
-        out['image_url'] = _normalize_image_url(og_image['content'])
-
-    # Generic image fallback when og:image is missing
-    if not out.get('image_url'):
-        fallback_meta = (
-            soup.find('meta', property='og:image:secure_url')
-            or soup.find('meta', attrs={'name': 'twitter:image'})
-            or soup.find('meta', attrs={'name': 'twitter:image:src'})
-        )
-        if fallback_meta and fallback_meta.get('content'):
-            out['image_url'] = _normalize_image_url(fallback_meta['content'])
-
-    if 'tkmaxx' in host and not out.get('image_url'):
-        tx_img = _tkmaxx_image_from_soup(soup)
-        if tx_img:
-            out['image_url'] = _normalize_image_url(tx_img)
-
-    if 'wayfair' in host and not out.get('image_url'):
-        wf_img = _wayfair_primary_image_from_soup(soup, url)
-        if wf_img:
-            out['image_url'] = _normalize_image_url(wf_img)
-
-    # Amazon-specific fallback for pages where og/twitter image is absent or blocked
-    if 'amazon.' in host and not out.get('image_url'):
-        amazon_image = _amazon_image_from_soup(soup)
-        if amazon_image:
-            out['image_url'] = _normalize_image_url(amazon_image)
-    # Some Amazon pages return a "continue shopping" shell for normal UAs.
-    # A social-crawler UA frequently exposes og:image reliably.
-    if 'amazon.' in host and not out.get('image_url'):
+
+@_register_extractor
+class _WayfairExtractor(_PreviewExtractor):
+    domains = ('wayfair',)
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def clean_title(self, title):
+        return _wayfair_clean_title(title)
+
+    def fallback_image(self, page, out, fetch):
+        image = _wayfair_primary_image_from_page(page)
+        if image:
+            return image
         try:
-            social_soup = _do_fetch(
-                user_agent='facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)'
+            social = fetch(user_agent=SOCIAL_CRAWLER_UA)
+            return social.meta.get('og:image') or _meta_image_fallback(social)
+        except Exception:
+            return None
+
+    def extract_price(self, page, out):
+        return _wayfair_extract_price(page)
+
+
+@_register_extractor
+class _TkMaxxExtractor(_PreviewExtractor):
+    domains = ('tkmaxx',)
+    full_body = True
+    fetch_timeout = 22
+    retry_user_agent = GOOGLEBOT_UA
+
+    def fetch_page(self, url, fetch, deadline):
+        soup = _tkmaxx_fetch_product_soup(url, deadline=min(deadline.at, time.monotonic() + TKMAXX_FETCH_DEADLINE))
+        if soup is None:
+            if deadline.expired():
+                deadline.cut_short = True
+            app.logger.warning(
+                'Product preview: TK Maxx returned no usable PDP (bot block / placeholder) for %s',
+                url[:120],
             )
-            social_og = social_soup.find('meta', property='og:image')
-            if social_og and social_og.get('content'):
-                out['image_url'] = _normalize_image_url(social_og['content'])
-            if not out.get('image_url'):
-                social_fallback = (
-                    social_soup.find('meta', property='og:image:secure_url')
-                    or social_soup.find('meta', attrs={'name': 'twitter:image'})
-                    or social_soup.find('meta', attrs={'name': 'twitter:image:src'})
-                )
-                if social_fallback and social_fallback.get('content'):
-                    out['image_url'] = _normalize_image_url(social_fallback['content'])
-            if not out.get('image_url'):
-                social_amazon_image = _amazon_image_from_soup(social_soup)
-                if social_amazon_image:
-                    out['image_url'] = _normalize_image_url(social_amazon_image)
+            return None
+        return _ProductPage(url, soup, deadline=deadline)
+
+    def enrich(self, page, out, fetch):
+        # Initial HTML is often a thin shell; social/crawler UAs get full OG tags and product markup.
+        # fetch() takes its timeout from the preview deadline and raises once it is spent.
+        try:
+            plain_len = len(page.plain_text)
+            if 'og:image' not in page.meta or plain_len < 1200:
+                social = fetch(user_agent=SOCIAL_CRAWLER_UA, timeout=25)
+                if 'og:image' in social.meta or len(social.plain_text) > plain_len + 300:
+                    page = social
+            if len(page.plain_text) < 800:
+                bot = fetch(user_agent=GOOGLEBOT_UA, timeout=25)
+                if len(bot.plain_text) > len(page.plain_text) + 200:
+                    page = bot
         except Exception:
             pass
+        return page
 
-    if 'wayfair' in host and not out.get('image_url'):
+    def fallback_image(self, page, out, fetch):
+        image = _tkmaxx_image_from_page(page)
+        if image:
+            return image
         try:
-            social_soup = _do_fetch(
-                user_agent='facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)'
-            )
-            social_og = social_soup.find('meta', property='og:image')
-            if social_og and social_og.get('content'):
-                out['image_url'] = _normalize_image_url(social_og['content'])
-            if not out.get('image_url'):
-                social_fallback = (
-                    social_soup.find('meta', property='og:image:secure_url')
-                    or social_soup.find('meta', attrs={'name': 'twitter:image'})
-                    or social_soup.find('meta', attrs={'name': 'twitter:image:src'})
-                )
-                if social_fallback and social_fallback.get('content'):
-                    out['image_url'] = _normalize_image_url(social_fallback['content'])
+            social = fetch(user_agent=SOCIAL_CRAWLER_UA, timeout=25)
+            return social.meta.get('og:image') or _tkmaxx_image_from_page(social)
         except Exception:
-            pass
+            return None
+
+    def extract_price(self, page, out):
+        return _tkmaxx_extract_price(page)
+
 
-    if 'tkmaxx' in host and not out.get('image_url'):
+@_register_extractor
+class _HmExtractor(_PreviewExtractor):
+    domains = ('hm',)
+    retry_user_agent = GOOGLEBOT_UA
+
+    def is_blocked(self, page, out):
+        # H&M frequently blocks server-side fetches (Akamai / bot protection).
+        # Detect it and return a usable fallback + signal to the UI.
         try:
-            social_soup = _do_fetch(
-                user_agent='facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)',
-                timeout=25,
-            )
-            social_og = social_soup.find('meta', property='og:image')
-            if social_og and social_og.get('content'):
-                out['image_url'] = _normalize_image_url(social_og['content'])
-            if not out.get('image_url'):
-                tx_img = _tkmaxx_image_from_soup(social_soup)
-                if tx_img:
-                    out['image_url'] = _normalize_image_url(tx_img)
+            title_tag = page.soup.find('title')
+            title_text = (title_tag.get_text() or '').strip().lower() if title_tag else ''
+            page_text = (page.text or '').strip().lower()
+            if 'access denied' in title_text or ('access denied' in page_text and 'permission to access' in page_text):
+                out['blocked'] = True
+                out['blocked_reason'] = 'H&M blocks automated previews; please fill manually.'
+                return True
         except Exception:
             pass
+        return False
 
-    # Price: site-specific and fallback regex
-    price = None
-    if 'wayfair' in host:
-        price = _wayfair_extract_price(soup)
-    if price is None and ('hulalahome.uk' in host or 'hulala' in url.lower()):
-        price = _hulalahome_extract_price(soup)
-    if price is None and ('made.com' in host or 'made' in host):
-        price = _made_extract_price(soup)
-    if price is None and 'tkmaxx' in host:
-        price = _tkmaxx_extract_price(soup)
-    if 'carousell' in url.lower():
+
+@_register_extractor
+class _MadeExtractor(_PreviewExtractor):
+    domains = ('made',)
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def enrich(self, page, out, fetch):
+        # MADE exposes richer OG data to social-crawler UAs; only re-fetch when og tags are thin.
         try:
-            # Carousell uses JSON-LD or meta tags for price
-            for script in soup.find_all('script', type='application/ld+json'):
-                if script.string and '"price"' in script.string:
-                    try:
-                        data = json.loads(script.string)
-                        if isinstance(data, dict) and 'offers' in data:
-                            offers = data['offers']
-                            if isinstance(offers, dict) and 'price' in offers:
-                                price_raw = offers.get('price', '')
-                                # Convert HK$ to GBP by dividing by 10
-                                try:
-                                    price_num = float(str(price_raw).replace(',', '').replace('HK$', '').replace('$', '').strip())
-                                    price = f"£{price_num / 10:.2f}".replace('.00', '')
-                                except (ValueError, AttributeError):
-                                    price = str(price_raw)
-                            elif isinstance(offers, list) and offers and 'price' in offers[0]:
-                                price_raw = offers[0]['price']
-                                try:
-                                    price_num = float(str(price_raw).replace(',', '').replace('HK$', '').replace('$', '').strip())
-                                    price = f"£{price_num / 10:.2f}".replace('.00', '')
-                                except (ValueError, AttributeError):
-                                    price = str(price_raw)
-                        if price:
-                            break
-                    except Exception:
-                        continue
-            # Fallback: look for price in text (HK$ or HKD format)
-            if not price:
-                text = soup.get_text()
-                # Try HK$ format first
-                m = re.search(r'HK\$\s*([\d,]+)(?:\.(\d{2}))?', text, re.I)
-                if m:
-                    whole_part = m.group(1).replace(',', '')
-                    dec_part = m.group(2) or '0'
-                    try:
-                        price_num = float(whole_part + '.' + dec_part)
-                        # Convert HK$ to GBP by dividing by 10
-                        price = f"£{price_num / 10:.2f}".replace('.00', '')
-                    except ValueError:
-                        price = m.group(0).strip()
-                # Fallback to regular currency symbols (but still convert if it's from Carousell)
-                if not price:
-                    m = re.search(r'[£$]\s*([\d,]+)(?:\.(\d{2}))?', text)
-                    if m:
-                        whole_part = m.group(1).replace(',', '')
-                        dec_part = m.group(2) or '0'
-                        try:
-                            price_num = float(whole_part + '.' + dec_part)
-                            # Convert HK$ to GBP by dividing by 10
-                            price = f"£{price_num / 10:.2f}".replace('.00', '')
-                        except ValueError:
-                            price = m.group(0).strip()
+            if page.meta.get('og:image') and page.meta.get('og:title'):
+                return page
+            social = fetch(user_agent=SOCIAL_CRAWLER_UA)
+            if not page.meta.get('og:title') and social.meta.get('og:title') and not out.get('title'):
+                out['title'] = social.meta['og:title'].strip()
+            if not page.meta.get('og:image') and social.meta.get('og:image') and not out.get('image_url'):
+                out['image_url'] = _normalize_image_url(social.meta['og:image'])
+            # Keep the richer page for price parsing too
+            return social
         except Exception:
-            pass
-    if not price and 'gumtree' in url.lower():
+            return page
+
+    def extract_price(self, page, out):
+        return _made_extract_price(page)
+
+
+@_register_extractor
+class _HulalaExtractor(_PreviewExtractor):
+    domains = ('hulalahome', 'hulala')
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def extract_price(self, page, out):
+        return _hulalahome_extract_price(page)
+
+
+def _hkd_to_gbp_display(amount):
+    """Carousell HK prices are shown in GBP at a rough 10:1 rate."""
+    return f"£{amount / 10:.2f}".replace('.00', '')
+
+
+@_register_extractor
+class _CarousellExtractor(_PreviewExtractor):
+    domains = ('carousell',)
+    full_body = True
+
+    def extract_price(self, page, out):
+        price = None
         try:
-            for script in soup.find_all('script', type='application/ld+json'):
-                if script.string and '"price"' in script.string:
-                    data = json.loads(script.string)
-                    if isinstance(data, dict) and 'offers' in data:
-                        offers = data['offers']
-                        if isinstance(offers, dict) and 'price' in offers:
-                            price = str(offers.get('price', ''))
-                        elif isinstance(offers, list) and offers and 'price' in offers[0]:
-                            price = str(offers[0]['price'])
-                    if price:
-                        break
-            if not price:
-                text = soup.get_text()
-                m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', text)
-                if m:
-                    price = m.group(0).strip()
+            # Carousell uses JSON-LD or meta tags for price
+            for data in page.json_ld:
+                offers = data.get('offers') if isinstance(data, dict) else None
+                if isinstance(offers, list) and offers:
+                    offers = offers[0]
+                if isinstance(offers, dict) and 'price' in offers:
+                    price_raw = offers.get('price', '')
+                    try:
+                        price_num = float(str(price_raw).replace(',', '').replace('HK$', '').replace('$', '').strip())
+                        price = _hkd_to_gbp_display(price_num)
+                    except (ValueError, AttributeError):
+                        price = str(price_raw)
+                if price:
+                    return price
+            # Fallback: look for price in text (HK$ first, then £/$ - still converted from HKD)
+            text = page.plain_text
+            for pattern in (r'HK\$\s*([\d,]+)(?:\.(\d{2}))?', r'[£$]\s*([\d,]+)(?:\.(\d{2}))?'):
+                m = re.search(pattern, text, re.I)
+                if not m:
+                    continue
+                whole_part = m.group(1).replace(',', '')
+                dec_part = m.group(2) or '0'
+                try:
+                    return _hkd_to_gbp_display(float(whole_part + '.' + dec_part))
+                except ValueError:
+                    return m.group(0).strip()
         except Exception:
             pass
-    if not price and 'amazon' in url.lower():
+        return price
+
+
+@_register_extractor
+class _GumtreeExtractor(_PreviewExtractor):
+    domains = ('gumtree',)
+
+    def extract_price(self, page, out):
         try:
-            for script in soup.find_all('script', type='application/ld+json'):
-                if script.string and 'price' in script.string.lower():
-                    data = json.loads(script.string)
-                    if isinstance(data, dict) and data.get('@type') == 'Product' and 'offers' in data:
-                        off = data['offers']
-                        if isinstance(off, dict) and 'price' in off:
-                            price = str(off.get('price', ''))
-                        elif isinstance(off, list) and off and 'price' in off[0]:
-                            price = str(off[0]['price'])
+            for data in page.json_ld:
+                if isinstance(data, dict) and 'offers' in data:
+                    offers = data['offers']
+                    if isinstance(offers, dict) and 'price' in offers:
+                        price = str(offers.get('price', ''))
+                    elif isinstance(offers, list) and offers and 'price' in offers[0]:
+                        price = str(offers[0]['price'])
+                    else:
+                        price = None
                     if price:
-                        break
-            if not price:
-                text = soup.get_text()
-                m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', text)
-                if m:
-                    price = m.group(0).strip()
-        except Exception:
-            pass
-    # Habitat: JSON-LD Product/offers or £ regex
-    if not price and 'habitat' in url.lower():
-        try:
-            for script in soup.find_all('script', type='application/ld+json'):
-                if not script.string:
-                    continue
-                try:
-                    data = json.loads(script.string)
-                except Exception:
-                    continue
-                if isinstance(data, dict) and data.get('@type') == 'Product':
-                    off = data.get('offers')
-                    if isinstance(off, dict) and 'price' in off:
-                        pv = off.get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                    if isinstance(off, list) and off and 'price' in off[0]:
-                        pv = off[0].get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict) and item.get('@type') == 'Product' and 'offers' in item:
-                            off = item['offers']
-                            if isinstance(off, dict) and 'price' in off:
-                                pv = off.get('price')
-                                if pv is not None:
-                                    price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                                    break
-                if price:
-                    break
-            if not price:
-                text = soup.get_text()
-                m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', text)
-                if m:
-                    price = m.group(0).strip()
+                        return price
+            return _first_gbp_in_text(page)
         except Exception:
-            pass
-    # IKEA: JSON-LD Product/offers or "Price £ 119" / £119 in page
-    if not price and 'ikea' in url.lower():
+            return None
+
+
+@_register_extractor
+class _JsonLdOfferExtractor(_PreviewExtractor):
+    """Habitat and IKEA: JSON-LD Product offers, else the first £ amount ("Price £ 119")."""
+
+    domains = ('habitat', 'ikea')
+    retry_user_agent = GOOGLEBOT_UA
+
+    def extract_price(self, page, out):
         try:
-            for script in soup.find_all('script', type='application/ld+json'):
-                if not script.string:
-                    continue
-                try:
-                    data = json.loads(script.string)
-                except Exception:
-                    continue
-                if isinstance(data, dict) and data.get('@type') == 'Product':
-                    off = data.get('offers')
-                    if isinstance(off, dict) and 'price' in off:
-                        pv = off.get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                    if isinstance(off, list) and off and 'price' in off[0]:
-                        pv = off[0].get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict) and item.get('@type') == 'Product' and 'offers' in item:
-                            off = item['offers']
-                            if isinstance(off, dict) and 'price' in off:
-                                pv = off.get('price')
-                                if pv is not None:
-                                    price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                                    break
-                if price:
-                    break
-            if not price:
-                text = soup.get_text()
-                # IKEA often shows "Price £ 119" or "£119"
-                m = re.search(r'£\s*[\d,]+(?:\.\d{2})?', text)
-                if m:
-                    price = m.group(0).strip()
+            return _json_ld_product_offer_price(page) or _first_gbp_in_text(page)
         except Exception:
-            pass
-    # Dunelm: JSON-LD first; then avoid "Free delivery over £60" by taking best product-price candidate
-    if not price and 'dunelm' in url.lower():
+            return None
+
+
+@_register_extractor
+class _DunelmExtractor(_PreviewExtractor):
+    domains = ('dunelm',)
+    full_body = True
+
+    def extract_price(self, page, out):
         try:
-            for script in soup.find_all('script', type='application/ld+json'):
-                if not script.string:
-                    continue
+            price = _json_ld_product_offer_price(page)
+            if price:
+                return price
+            # Page has "Free Standard Delivery Over £60" and "£250 gift card" before product price £199
+            text = page.plain_text
+            candidates = []
+            skip_vals = {60, 250}  # delivery threshold, gift card
+            for m in re.finditer(r'£\s*([\d,]+)(?:\.(\d{2}))?', text):
+                whole = (m.group(1) or '').replace(',', '')
+                dec = m.group(2) or '00'
                 try:
-                    data = json.loads(script.string)
-                except Exception:
+                    val = float(whole + '.' + dec)
+                except ValueError:
                     continue
-                if isinstance(data, dict) and data.get('@type') == 'Product':
-                    off = data.get('offers')
-                    if isinstance(off, dict) and 'price' in off:
-                        pv = off.get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                    if isinstance(off, list) and off and 'price' in off[0]:
-                        pv = off[0].get('price')
-                        if pv is not None:
-                            price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                            break
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict) and item.get('@type') == 'Product' and 'offers' in item:
-                            off = item['offers']
-                            if isinstance(off, dict) and 'price' in off:
-                                pv = off.get('price')
-                                if pv is not None:
-                                    price = '£' + str(pv) if not str(pv).startswith('£') else str(pv)
-                                    break
-                if price:
-                    break
-            if not price:
-                text = soup.get_text()
-                # Page has "Free Standard Delivery Over £60" and "£250 gift card" before product price £199
-                all_m = list(re.finditer(r'£\s*([\d,]+)(?:\.(\d{2}))?', text))
-                candidates = []
-                skip_vals = {60, 250}  # delivery threshold, gift card
-                for m in all_m:
-                    whole = (m.group(1) or '').replace(',', '')
-                    dec = m.group(2) or '00'
-                    try:
-                        val = float(whole + '.' + dec)
-                        if 80 <= val <= 5000 and val not in skip_vals:
-                            candidates.append((val, m.group(0).strip()))
-                    except ValueError:
-                        pass
-                if candidates:
-                    best = max(candidates, key=lambda x: x[0])
-                    price = best[1]
+                if 80 <= val <= 5000 and val not in skip_vals:
+                    candidates.append((val, m.group(0).strip()))
+            if candidates:
+                return max(candidates, key=lambda x: x[0])[1]
         except Exception:
             pass
-    # Southgate Auction Rooms: guide price range on lot pages
-    if not price and 'southgateauctionrooms.com' in host:
+        return None
+
+
+@_register_extractor
+class _SouthgateAuctionExtractor(_PreviewExtractor):
+    """Southgate Auction Rooms lot pages: guide price range."""
+
+    domains = ('southgateauctionrooms',)
+    full_body = True
+
+    def extract_price(self, page, out):
+        soup = page.soup
+        price = None
         try:
             out['website_name'] = out.get('website_name') or 'Southgate Auction Rooms'
             if not out.get('category'):
@@ -2458,7 +2712,7 @@ def _fetch_product_preview(url):
             h1 = soup.find('h1')
             if h1 and h1.get_text(strip=True):
                 out['title'] = h1.get_text(strip=True)
-            text = soup.get_text(' ', strip=True)
+            text = page.text
             price = _auction_gbp_estimate_from_text(text)
             if not price:
                 m = re.search(r'Guide price:\s*(£[^\n|]+)', text, re.I)
@@ -2474,29 +2728,33 @@ def _fetch_product_preview(url):
                         break
         except Exception:
             pass
-    # The Saleroom (e.g. Southgate Auction Rooms online catalogue)
-    if 'the-saleroom.com' in host or host.endswith('saleroom.com'):
+        return price
+
+
+@_register_extractor
+class _SaleroomExtractor(_PreviewExtractor):
+    """The Saleroom (e.g. Southgate Auction Rooms online catalogue)."""
+
+    domains = ('the-saleroom', 'saleroom')
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def extract_price(self, page, out):
+        soup = page.soup
+        price = None
         try:
             if not out.get('category'):
                 out['category'] = 'Auction'
-            if 'southgate' in url.lower():
+            if 'southgate' in page.url.lower():
                 out['website_name'] = 'Southgate Auction Rooms (The Saleroom)'
             else:
                 out['website_name'] = out.get('website_name') or 'The Saleroom'
             h1 = soup.find('h1')
             if h1 and h1.get_text(strip=True):
                 out['title'] = h1.get_text(strip=True)
-            text = soup.get_text(' ', strip=True)
+            price = _auction_gbp_estimate_from_text(page.text)
             if not price:
-                price = _auction_gbp_estimate_from_text(text)
-            if not price:
-                for script in soup.find_all('script', type='application/ld+json'):
-                    if not script.string:
-                        continue
-                    try:
-                        data = json.loads(script.string)
-                    except Exception:
-                        continue
+                for data in page.json_ld:
                     nodes = data if isinstance(data, list) else [data]
                     for node in nodes:
                         if not isinstance(node, dict):
@@ -2525,8 +2783,18 @@ def _fetch_product_preview(url):
                         break
         except Exception:
             pass
-    # Etsy listings
-    if 'etsy.com' in host:
+        return price
+
+
+@_register_extractor
+class _EtsyExtractor(_PreviewExtractor):
+    domains = ('etsy',)
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def extract_price(self, page, out):
+        soup = page.soup
+        price = None
         try:
             out['website_name'] = out.get('website_name') or 'Etsy'
             if not out.get('category'):
@@ -2534,11 +2802,9 @@ def _fetch_product_preview(url):
             h1 = soup.find('h1')
             if h1 and h1.get_text(strip=True):
                 out['title'] = h1.get_text(strip=True)
+            price = _price_from_json_ld(page)
             if not price:
-                price = _price_from_json_ld_scripts(soup)
-            if not price:
-                text = soup.get_text(' ', strip=True)
-                m = re.search(r'(?:Price:|Now)\s*£\s*([\d,]+(?:\.\d{2})?)', text, re.I)
+                m = re.search(r'(?:Price:|Now)\s*£\s*([\d,]+(?:\.\d{2})?)', page.text, re.I)
                 if m:
                     price = '£' + m.group(1)
             if not out.get('image_url'):
@@ -2549,62 +2815,274 @@ def _fetch_product_preview(url):
                         break
         except Exception:
             pass
-    # Temu product pages (gallery image often only in URL query or inline JSON)
-    if 'temu.com' in host:
+        return price
+
+
+@_register_extractor
+class _TemuExtractor(_PreviewExtractor):
+    """Temu product pages: gallery image often only in the URL query or inline JSON."""
+
+    domains = ('temu',)
+    full_body = True
+    retry_user_agent = GOOGLEBOT_UA
+
+    def seed(self, url, out):
+        for key, val in _temu_preview_from_url(url).items():
+            if val and not out.get(key):
+                out[key] = val
+
+    def extract_price(self, page, out):
+        price = None
         try:
             out['website_name'] = out.get('website_name') or 'Temu'
             if not out.get('title'):
-                title_from_path = _temu_title_from_path(urlparse(url).path)
+                title_from_path = _temu_title_from_path(urlparse(page.url).path)
                 if title_from_path:
                     out['title'] = title_from_path
-            if not out.get('title'):
-                og_t = soup.find('meta', property='og:title')
-                if og_t and og_t.get('content'):
-                    out['title'] = og_t['content'].strip()
-            if not price:
-                price = _price_from_json_ld_scripts(soup)
-            if not price and out.get('price'):
-                price = out['price']
+            if not out.get('title') and page.meta.get('og:title'):
+                out['title'] = page.meta['og:title'].strip()
+            price = _price_from_json_ld(page) or out.get('price')
             if not price:
-                text = soup.get_text(' ', strip=True)
-                m = re.search(r'£\s*([\d,]+(?:\.\d{2})?)', text)
+                m = re.search(r'£\s*([\d,]+(?:\.\d{2})?)', page.text)
                 if m:
                     price = '£' + m.group(1)
             if not out.get('image_url'):
-                og_img = soup.find('meta', property='og:image')
-                if og_img and og_img.get('content') and 'kwcdn' in og_img['content']:
-                    out['image_url'] = _normalize_image_url(og_img['content'])
+                og_img = page.meta.get('og:image') or ''
+                if 'kwcdn' in og_img:
+                    out['image_url'] = _normalize_image_url(og_img)
             if not out.get('image_url'):
-                for img in soup.find_all('img'):
+                for img in page.img_tags:
                     src = (img.get('src') or img.get('data-src') or img.get('data-original') or '').strip()
                     if src and 'kwcdn.com' in src and 'logo' not in src.lower():
                         out['image_url'] = _normalize_image_url(src)
                         break
             if not out.get('image_url'):
-                html_img = _temu_images_from_html(str(soup))
+                html_img = _temu_images_from_html(page.html_bytes)
                 if html_img:
                     out['image_url'] = html_img
             if not out.get('image_url'):
-                for key, val in _temu_preview_from_url(url).items():
-                    if key == 'image_url' and val:
-                        out['image_url'] = val
-                        break
+                url_img = _temu_preview_from_url(page.url).get('image_url')
+                if url_img:
+                    out['image_url'] = url_img
         except Exception:
             pass
-    if not price:
+        return price
+
+
+def _fetch_product_preview(url, validators=None):
+    """Fetch a URL and extract title, image_url, website_name, price. Returns dict (at least title from URL + website_name).
+
+    validators (price_refresh.PageValidators) make the main page fetch conditional; after a 304 it has
+    not_modified set and the dict holds only the URL-derived fields.
+    """
+    if not url or not url.startswith(('http://', 'https://')):
+        return None
+    # Stage timings go to the active timer (the route's, for the Server-Timing header) and to PREVIEW_TIMINGS.
+    with preview_timing.activate() as timer:
         try:
-            text = soup.get_text()
-            m = re.search(r'[£$]\s*[\d,]+(?:\.\d{2})?', text)
-            if m:
-                price = m.group(0).strip()
-        except Exception:
-            pass
+            with timer.stage('total'):
+                return _extract_product_preview(url, timer, validators)
+        finally:
+            PREVIEW_TIMINGS.record(timer)
+
+
+# Hosts that keep bot-blocking / timing out are skipped for a cooldown (URL-derived fields only), then probed again.
+PREVIEW_BREAKER = CircuitBreaker(
+    'preview',
+    failure_threshold=int(os.getenv('PREVIEW_BREAKER_FAILURES', '3')),
+    window=float(os.getenv('PREVIEW_BREAKER_WINDOW', '300')),
+    cooldown=float(os.getenv('PREVIEW_BREAKER_COOLDOWN', '120')),
+    max_cooldown=float(os.getenv('PREVIEW_BREAKER_MAX_COOLDOWN', '900')),
+)
+# Overall time budget of one product preview: the main fetch, the retry UA and every social / crawler re-fetch.
+PREVIEW_DEADLINE = float(os.getenv('PREVIEW_DEADLINE', '25'))
+# HTTP statuses that mean "refused / overloaded", as opposed to a bad link (404) that says nothing about the host.
+_PREVIEW_BLOCK_STATUSES = {401, 403, 405, 429, 500, 502, 503, 504}
+
+
+def _preview_breaker_key(url):
+    host = (urlparse(url).netloc or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _preview_fetch_failure(e):
+    """Breaker reason for a failed page fetch, or None when the error is not a block / outage sign."""
+    if isinstance(e, requests.Timeout):
+        return 'timeout'
+    if isinstance(e, requests.ConnectionError):
+        return 'connection error'
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        if e.response.status_code in _PREVIEW_BLOCK_STATUSES:
+            return f'HTTP {e.response.status_code}'
+    return None
+
+
+def _extract_product_preview(url, timer, validators=None):
+    out = {}
+    # Always set website_name and URL-derived title so we have something even when fetch fails
+    out['website_name'] = _website_name_from_url(url)
+    url_title = _title_from_url(url)
+    if url_title:
+        out['title'] = url_title
+
+    extractor = _preview_extractor_for(url)
+    timer.retailer = extractor.name
+    extractor.seed(url, out)
+    deadline = Deadline(PREVIEW_DEADLINE)
+    try:
+        with PREVIEW_BREAKER.attempt(_preview_breaker_key(url)) as attempt:
+            data = _scrape_product_preview(url, extractor, out, timer, attempt, deadline, validators)
+    except CircuitOpen as e:
+        out['blocked'] = True
+        out['blocked_reason'] = (
+            f"{out.get('website_name') or 'This site'} is blocking automated previews right now "
+            f"(retrying in about {e.retry_after}s); please fill manually."
+        )
+        return out
+    if data is not None and deadline.cut_short:
+        # Some fetch or fallback was skipped (or stopped early) for lack of time.
+        data['partial'] = True
+    return data
+
+
+def _scrape_product_preview(url, extractor, out, timer, attempt, deadline, validators=None):
+    """Fetch and extract into out (already seeded from the URL); the fetch outcome is recorded on attempt.
+
+    Every fetch takes its timeout from deadline and raises DeadlineExceeded once too little is left,
+    so the fallbacks (which swallow fetch errors) are skipped and extraction carries on with what it has.
+    validators go with the first page fetch only; a 304 ends the preview with out as it is.
+    """
+    refetching = []
+    conditional = [validators] if validators is not None else []
+
+    def fetch(user_agent=None, timeout=None):
+        timeout = deadline.timeout(timeout or extractor.fetch_timeout)
+        if not refetching:
+            return _fetch_product_page(
+                url,
+                user_agent=user_agent,
+                timeout=timeout,
+                full_body=extractor.full_body,
+                deadline=deadline,
+                validators=conditional.pop() if conditional else None,
+            )
+        # Retries and social / crawler UA re-fetches are one 'refetch' stage, not more connect/parse time.
+        with timer.stage('refetch'), timer.muted():
+            return _fetch_product_page(
+                url,
+                user_agent=user_agent,
+                timeout=timeout,
+                full_body=extractor.full_body,
+                deadline=deadline,
+            )
+
+    try:
+        with timer.stage('fetch'):
+            page = extractor.fetch_page(url, fetch, deadline)
+    except price_refresh.PageNotModified:
+        attempt.success()
+        return out
+    except Exception as e:
+        refetching.append(True)
+        app.logger.warning(f"Product preview fetch failed for {url[:80]}: {e}")
+        if not extractor.retry_user_agent:
+            reason = _preview_fetch_failure(e)
+            if reason:
+                attempt.failure(reason)
+            return out if out.get('title') or out.get('website_name') else None
+        # Retry with a different User-Agent for known retailers (sometimes returns different HTML)
+        try:
+            page = fetch(user_agent=extractor.retry_user_agent)
+        except Exception as e2:
+            app.logger.warning(f"Product preview retry failed: {e2}")
+            reason = _preview_fetch_failure(e2) or _preview_fetch_failure(e)
+            if reason:
+                attempt.failure(reason)
+            return out if out.get('title') or out.get('website_name') else None
+    refetching.append(True)
+    if page is None:
+        attempt.failure('no usable page (bot block / placeholder)')
+        return out if out.get('title') or out.get('website_name') else None
+    if extractor.is_blocked(page, out):
+        attempt.failure('bot wall')
+        return out
+    attempt.success()
+    with timer.stage('enrich'):
+        page = extractor.enrich(page, out, fetch)
+
+    # Open Graph / generic meta
+    with timer.stage('title_image'):
+        if page.meta.get('og:title'):
+            out['title'] = page.meta['og:title'].strip()
+        if out.get('title'):
+            cleaned = extractor.clean_title(out['title'])
+            if cleaned:
+                out['title'] = cleaned
+        if page.meta.get('og:image'):
+            out['image_url'] = _normalize_image_url(page.meta['og:image'])
+        if not out.get('image_url'):
+            fallback_image = _meta_image_fallback(page) or extractor.fallback_image(page, out, fetch)
+            if fallback_image:
+                out['image_url'] = _normalize_image_url(fallback_image)
+
+    with timer.stage('price'):
+        price = extractor.extract_price(page, out)
+        if not price:
+            try:
+                m = re.search(r'[£$]\s*[\d,]+(?:\.\d{2})?', page.plain_text)
+                if m:
+                    price = m.group(0).strip()
+            except Exception:
+                pass
     if price:
         out['price'] = price
 
     return out
 
 
+# Per retailer / stage timings of recent previews in this worker, for /api/products/preview/timings.
+PREVIEW_TIMINGS = preview_timing.TimingStats(max_samples=int(os.getenv('PREVIEW_TIMING_SAMPLES', '500')))
+
+
+# Previews are cached per canonical product URL; URL-only results (fetch failed / blocked) expire quickly.
+PREVIEW_CACHE = PreviewCache(
+    max_entries=int(os.getenv('PREVIEW_CACHE_SIZE', '512')),
+    ttl=float(os.getenv('PREVIEW_CACHE_TTL', '900')),
+    negative_ttl=float(os.getenv('PREVIEW_CACHE_NEGATIVE_TTL', '60')),
+)
+
+
+def _is_negative_preview(data):
+    """True when a preview has nothing beyond what the URL alone gives us, or was cut short by its deadline."""
+    return not data or data.get('partial') or not (data.get('image_url') or data.get('price'))
+
+
+def _cached_product_preview(url):
+    """_fetch_product_preview through PREVIEW_CACHE, keyed on the canonical product URL.
+
+    Concurrent requests for the same link (paste + blur, two people pasting it) share one scrape.
+    """
+    outcome, data = PREVIEW_CACHE.resolve(
+        canonical_product_url(url), lambda: _fetch_product_preview(url), is_negative=_is_negative_preview
+    )
+    timer = preview_timing.current()
+    if timer is not None:
+        timer.cache = outcome
+        timer.retailer = _preview_extractor_for(url).name
+    return data
+
+
+def _preview_or_url_fallback(url):
+    """Cached preview for url, or (last resort) title/website_name from the URL alone."""
+    data = _cached_product_preview(url)
+    if not data:
+        data = {
+            'title': _title_from_url(url) or 'Product',
+            'website_name': _website_name_from_url(url),
+        }
+    return data
+
+
 def _coerce_bool(value, default=False):
     """Coerce common JSON boolean representations safely."""
     if value is None:
@@ -2626,14 +3104,291 @@ def product_preview():
         return jsonify({'error': 'url is required'}), 400
     if not url.startswith(('http://', 'https://')):
         return jsonify({'error': 'Invalid URL'}), 400
-    data = _fetch_product_preview(url)
-    if not data:
-        # Last resort: only from URL
-        data = {
-            'title': _title_from_url(url) or 'Product',
-            'website_name': _website_name_from_url(url),
-        }
-    return jsonify(data), 200
+    timer = preview_timing.PreviewTimer()
+    with preview_timing.activate(timer):
+        resp, status = _scrape_response('product_preview', lambda: (_preview_or_url_fallback(url), 200), {'url': url})
+    if status == 200:
+        resp.headers['Server-Timing'] = timer.server_timing()
+    return resp, status
+
+
+# Bulk previews run on the scrape bulkhead; each request keeps at most PREVIEW_BULK_CONCURRENCY fetches in
+# flight, PREVIEW_BULK_PER_HOST of them per retailer.
+PREVIEW_BULK_MAX_URLS = int(os.getenv('PREVIEW_BULK_MAX_URLS', '50'))
+PREVIEW_BULK_CONCURRENCY = int(os.getenv('PREVIEW_BULK_CONCURRENCY', '6'))
+PREVIEW_BULK_PER_HOST = int(os.getenv('PREVIEW_BULK_PER_HOST', '2'))
+# Seconds a bulk request waits while other requests keep the bulkhead full before the URLs it could not
+# start are answered with a busy error.
+PREVIEW_BULK_BUSY_WAIT = float(os.getenv('PREVIEW_BULK_BUSY_WAIT', '30'))
+
+
+def _iter_bulk_previews(urls):
+    """Yield (index, url, data, error) as previews complete, keeping per-host fetches bounded.
+
+    error is a BulkheadFull for URLs never started because the bulkhead stayed full for PREVIEW_BULK_BUSY_WAIT.
+    """
+    queued = list(enumerate(urls))
+    in_flight = {}
+    host_load = {}
+    busy_since = None
+    try:
+        while queued or in_flight:
+            full = None
+            for item in list(queued):
+                if len(in_flight) >= PREVIEW_BULK_CONCURRENCY:
+                    break
+                host = (urlparse(item[1]).netloc or '').lower()
+                if host_load.get(host, 0) >= PREVIEW_BULK_PER_HOST:
+                    continue
+                try:
+                    future = SCRAPE_BULKHEAD.submit(_preview_or_url_fallback, item[1])
+                except BulkheadFull as e:
+                    # Bulkhead saturated by other requests: wait for our own work or a free slot and retry.
+                    full = e
+                    break
+                busy_since = None
+                queued.remove(item)
+                host_load[host] = host_load.get(host, 0) + 1
+                in_flight[future] = (item, host)
+            timeout = None
+            if full is not None:
+                busy_since = busy_since or time.monotonic()
+                timeout = busy_since + PREVIEW_BULK_BUSY_WAIT - time.monotonic()
+                if timeout <= 0:
+                    for index, url in queued:
+                        yield index, url, None, full
+                    queued = []
+                    timeout = None
+            if not in_flight:
+                if queued:
+                    SCRAPE_BULKHEAD.wait_for_capacity(timeout)
+                continue
+            done, _ = futures_wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                (index, url), host = in_flight.pop(future)
+                host_load[host] -= 1
+                try:
+                    yield index, url, future.result(), None
+                except Exception as e:
+                    app.logger.warning(f"Bulk product preview failed for {url[:80]}: {e}")
+                    yield index, url, None, str(e)
+    finally:
+        # Client went away: drop whatever has not started yet.
+        for future in in_flight:
+            future.cancel()
+
+
+@app.route('/api/products/preview/bulk', methods=['POST'])
+def product_preview_bulk():
+    """POST {urls: [...]} - previews fetched concurrently, streamed as NDJSON lines {index, url, data|error} in completion order."""
+    body = request.get_json(silent=True) or {}
+    urls = body.get('urls')
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'error': 'urls (non-empty list) is required'}), 400
+    if len(urls) > PREVIEW_BULK_MAX_URLS:
+        return jsonify({'error': f'At most {PREVIEW_BULK_MAX_URLS} urls per request'}), 400
+    urls = [str(u or '').strip() for u in urls]
+    bad = [u for u in urls if not u.startswith(('http://', 'https://'))]
+    if bad:
+        return jsonify({'error': 'Invalid URL', 'invalid': bad[:10]}), 400
+    if not SCRAPE_BULKHEAD.has_capacity():
+        return _scrape_busy_response(SCRAPE_BULKHEAD.retry_after)
+
+    def generate():
+        try:
+            with SCRAPE_BULKHEAD.waiter():
+                for index, url, data, error in _iter_bulk_previews(urls):
+                    line = {'index': index, 'url': url}
+                    if isinstance(error, BulkheadFull):
+                        line.update(error=str(error), busy=True, retry_after=error.retry_after)
+                    elif error:
+                        line['error'] = error
+                    else:
+                        line['data'] = data
+                    yield json.dumps(line) + '\n'
+        except BulkheadFull as e:
+            yield json.dumps({'error': str(e), 'retry_after': e.retry_after}) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/products/cache')
+def product_cache_stats():
+    """GET - size, age and counters of this worker's ha_products snapshot (PRODUCT_CACHE_TTL)."""
+    return jsonify(PRODUCT_CACHE.stats()), 200
+
+
+@app.route('/api/products/tags')
+def product_tag_query():
+    """GET - products matching ?all=a,b&any=c,d&not=e (tag= is an alias of all=), newest first, with
+    {tag: count} over the matches. No tags: every product. Optional fields= trims rows; products=0 returns counts only.
+    """
+    if not supabase:
+        return jsonify({'count': 0, 'tag_counts': {}, 'products': []}), 200
+    try:
+        query = TagQuery.from_args(request.args)
+        fields = list_pages.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if PRODUCT_CACHE.enabled:
+            rows, counts = PRODUCT_CACHE.tag_search(query)
+        else:
+            # No snapshot to keep an index next to: index this one read.
+            by_id = {row.get('id'): row for row in fetch_all_rows(supabase, 'ha_products')}
+            index = TagIndex(by_id.values())
+            ids = index.ids(query)
+            rows, counts = [by_id[i] for i in ids], index.counts(ids)
+        result = {'query': query.to_dict(), 'count': len(rows), 'tag_counts': counts}
+        if request.args.get('products', '').strip().lower() not in ('0', 'false', 'no'):
+            rows = ListPage('created_at', desc=True).page_rows(rows)
+            result['products'] = list_pages.project_rows(rows, fields)
+        return jsonify(result), 200
+    except Exception as e:
+        app.logger.error(f"Error querying product tags: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/products/preview/cache')
+def product_preview_cache_stats():
+    """GET - size, hit/miss counters and TTLs of this worker's preview cache (for sizing PREVIEW_CACHE_*)."""
+    return jsonify(PREVIEW_CACHE.stats()), 200
+
+
+@app.route('/api/products/preview/timings')
+def product_preview_timings():
+    """GET - p50/p95/p99 per retailer and stage (connect, download, parse, fetch, refetch, enrich, title_image, price, total)."""
+    return jsonify(PREVIEW_TIMINGS.snapshot()), 200
+
+
+@app.route('/api/products/preview/breakers')
+def product_preview_breakers():
+    """GET - per-host circuit breaker state of this worker's product previews (open hosts are skipped)."""
+    return jsonify(PREVIEW_BREAKER.stats()), 200
+
+
+@app.route('/api/scrape/bulkhead')
+def scrape_bulkhead_stats():
+    """GET - running/queued/rejected counts of this worker's scrape bulkhead (for sizing SCRAPE_BULKHEAD_*)."""
+    return jsonify(SCRAPE_BULKHEAD.stats()), 200
+
+
+# ---------- Background scrape jobs ----------
+# Slow scrapes can run as jobs: add ?async=1 (or "async": true in a JSON body) to the product, car
+# and restaurant preview endpoints or to /api/import/event-url and they return 202 with a job id.
+# Sync or async, the scrape itself runs on SCRAPE_BULKHEAD, so slow retailers cannot take every
+# request thread away from /api/products and the pages; when it is full those routes answer 503.
+
+# A job's event stream pins a request thread, so it holds a SCRAPE_BULKHEAD waiter slot (503 when none is
+# free) and ends after SCRAPE_JOB_SSE_WINDOW seconds; EventSource then reconnects after the retry: delay.
+SCRAPE_JOB_SSE_WINDOW = float(os.getenv('SCRAPE_JOB_SSE_WINDOW', '20'))
+SCRAPE_JOB_SSE_RETRY_MS = 2000
+SCRAPE_BULKHEAD = Bulkhead(
+    'scrape',
+    max_workers=int(os.getenv('SCRAPE_BULKHEAD_WORKERS', '6')),
+    max_queue=int(os.getenv('SCRAPE_BULKHEAD_QUEUE', '12')),
+    # Request threads allowed to sit waiting on a scrape; keep below gunicorn --threads.
+    max_waiters=int(os.getenv('SCRAPE_BULKHEAD_MAX_WAITERS', '4')),
+)
+
+
+def _wants_async():
+    """True when the caller asked for a background job instead of waiting on the scrape."""
+    if _coerce_bool(request.args.get('async')):
+        return True
+    body = request.get_json(silent=True) if request.is_json else None
+    return isinstance(body, dict) and _coerce_bool(body.get('async'))
+
+
+def _scrape_job_runner():
+    return scrape_jobs.get_runner(executor=SCRAPE_BULKHEAD)
+
+
+def _scrape_busy_response(retry_after):
+    resp = jsonify({'error': 'Too many link lookups in progress, please retry shortly', 'retry_after': retry_after})
+    resp.headers['Retry-After'] = str(retry_after)
+    return resp, 503
+
+
+def _scrape_response(kind, fn, params):
+    """Run fn (returning (body, status)) on the scrape bulkhead: as a 202 job when asked, else wait for it."""
+    try:
+        if _wants_async():
+            job_id = _scrape_job_runner().submit(kind, fn, params)
+            return jsonify({
+                'job_id': job_id,
+                'status': scrape_jobs.STATUS_QUEUED,
+                'status_url': f'/api/scrape-jobs/{job_id}',
+                'events_url': f'/api/scrape-jobs/{job_id}/events',
+            }), 202
+        body, status = SCRAPE_BULKHEAD.run(fn)
+    except BulkheadFull as e:
+        app.logger.warning(f"Scrape bulkhead full, rejecting {kind}: {params.get('url', '')[:80]}")
+        return _scrape_busy_response(e.retry_after)
+    return jsonify(body), status
+
+
+@app.route('/api/scrape-jobs/<job_id>')
+def get_scrape_job(job_id):
+    """GET - job status; once done, result holds what the synchronous endpoint returns and http_status its status code."""
+    job = _scrape_job_runner().store.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
+@app.route('/api/scrape-jobs/<job_id>/events')
+def scrape_job_events(job_id):
+    """GET - Server-Sent Events: a 'status' event on every change, then 'done' (or 'error') with the job and close.
+
+    Each stream lasts at most SCRAPE_JOB_SSE_WINDOW seconds and counts as a scrape bulkhead waiter (503 with
+    Retry-After when those are taken); EventSource reconnects on its own. Clients that cannot should poll
+    GET /api/scrape-jobs/<id> instead.
+    """
+    store = _scrape_job_runner().store
+    if not store.get(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    if not SCRAPE_BULKHEAD.has_waiter_slot():
+        return _scrape_busy_response(SCRAPE_BULKHEAD.retry_after)
+
+    def generate():
+        try:
+            with SCRAPE_BULKHEAD.waiter():
+                yield f'retry: {SCRAPE_JOB_SSE_RETRY_MS}\n\n'
+                last_status = None
+                last_sent = time.monotonic()
+                end_at = time.monotonic() + SCRAPE_JOB_SSE_WINDOW
+                while True:
+                    job = store.get(job_id)
+                    if job is None:
+                        yield 'event: error\ndata: {"error": "Job not found"}\n\n'
+                        return
+                    if job['status'] in scrape_jobs.FINAL_STATUSES:
+                        yield f"event: {'done' if job['status'] == scrape_jobs.STATUS_DONE else 'error'}\ndata: {json.dumps(job)}\n\n"
+                        return
+                    if job['status'] != last_status:
+                        last_status = job['status']
+                        last_sent = time.monotonic()
+                        yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                    elif time.monotonic() - last_sent > 15:
+                        last_sent = time.monotonic()
+                        yield ': keep-alive\n\n'
+                    if time.monotonic() >= end_at:
+                        # Free the thread; the client reconnects after retry: and gets the current status.
+                        return
+                    time.sleep(0.5)
+        except BulkheadFull as e:
+            yield f'retry: {e.retry_after * 1000}\nevent: busy\ndata: {json.dumps({"error": str(e), "retry_after": e.retry_after})}\n\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'X-Accel-Buffering': 'no'},
+    )
 
 
 PRESENT_PRODUCT_TAG = 'present'
@@ -2641,11 +3396,7 @@ BABY_PRODUCT_TAG = 'baby'
 
 
 def _product_has_tag(row, tag_name):
-    tags = row.get('tags')
-    if not isinstance(tags, list):
-        return False
-    target = str(tag_name).strip().lower()
-    return any(str(t).strip().lower() == target for t in tags)
+    return normalize_tag(tag_name) in row_tags(row)
 
 
 def _is_present_product(row):
@@ -2670,6 +3421,251 @@ def _is_baby_product(row):
     return False
 
 
+# Numeric price columns (tables/ha_products_add_price_amount.sql), written alongside the free-text price.
+_PRICE_COLUMNS = ('price_amount', 'price_max', 'currency')
+
+
+def _with_price_columns(payload):
+    """payload plus price_amount / price_max / currency parsed from its price, when price is being written."""
+    if 'price' in payload:
+        payload.update(price_refresh.price_columns(payload['price']))
+    return payload
+
+
+# ---------- Product cache ----------
+# Process-local snapshot of ha_products for the product list pages (product_cache). Writes through this
+# worker patch it; before each use one small query compares the table's row count and latest updated_at
+# (tables/ha_products_add_updated_at.sql) with the snapshot's, so writes through the other worker or a
+# script are read back at once. PRODUCT_CACHE_TTL (seconds) forces a full reload on top. 0 disables.
+def _product_table_version():
+    r = (
+        supabase.table('ha_products')
+        .select('updated_at', count='exact')
+        .order('updated_at', desc=True)
+        .limit(1)
+        .execute()
+    )
+    return r.count, (r.data[0].get('updated_at') if r.data else None)
+
+
+def _product_snapshot_version(rows):
+    rows = list(rows)
+    return len(rows), max((row.get('updated_at') for row in rows if row.get('updated_at')), default=None)
+
+
+PRODUCT_CACHE = ProductCache(
+    lambda: fetch_all_rows(supabase, 'ha_products'),
+    ttl=float(os.getenv('PRODUCT_CACHE_TTL', '60')),
+    version=_product_table_version,
+    snapshot_version=_product_snapshot_version,
+)
+
+
+def _has_product_flag(row, column, legacy_match):
+    """row[column] is true (as .eq(column, True) would match), or legacy_match(row) when the column is missing."""
+    if column in row:
+        return row[column] is True
+    return legacy_match(row)
+
+
+# Derived ha_products columns written by the app, keyed by the migration that adds them.
+_DERIVED_PRODUCT_COLUMNS = {
+    'tables/ha_products_add_price_amount.sql': _PRICE_COLUMNS,
+    'tables/ha_products_add_room_key.sql': ('room_key',),
+}
+# in_mwh / in_hk are not written by the app: the ha_products_membership trigger
+# (tables/ha_products_add_membership.sql) derives them from the row being written.
+
+
+def _execute_product_write(write, payload):
+    """write(payload).execute(); retried without derived columns (price_amount, room_key, ...) whose migration has not been run.
+
+    The written rows are patched into PRODUCT_CACHE.
+    """
+    pending = dict(_DERIVED_PRODUCT_COLUMNS)
+    while True:
+        try:
+            r = write(payload).execute()
+            for row in r.data or []:
+                PRODUCT_CACHE.upsert(row)
+            return r
+        except Exception as e:
+            migration = next((m for m, cols in pending.items() if any(col in str(e) for col in cols)), None)
+            if migration is None:
+                raise
+            columns = pending.pop(migration)
+            app.logger.warning(f"ha_products columns {', '.join(columns)} missing, run {migration}: {e}")
+            payload = {k: v for k, v in payload.items() if k not in columns}
+
+
+def _list_page(column, desc=False):
+    """ListPage for this request's limit= / cursor= / fields= (list_pages); ValueError when invalid."""
+    return ListPage.from_args(request.args, column, desc=desc)
+
+
+def _list_response(rows, page):
+    """JSON array of rows (cut to fields=), with X-Next-Cursor when there is another page."""
+    resp = jsonify(page.project(rows))
+    if page.next_cursor:
+        resp.headers[list_pages.NEXT_CURSOR_HEADER] = page.next_cursor
+    return resp, 200
+
+
+def _list_rows(table, page, where=None, needs=()):
+    """Rows of table matching where(query), in page order: one page when the request is paged, else all rows."""
+    if page.paged:
+        query = supabase.table(table).select(page.select(needs))
+        if where is not None:
+            query = where(query)
+        return page.page(page.apply(query).execute().data or [])
+    return fetch_all_rows(supabase, table, page.select(needs), where=where, order=page.order)
+
+
+def _page_loaded_rows(rows, page):
+    """Order and page rows already held in full (product cache, legacy fallbacks) as the query would."""
+    return page.page_rows(rows, value=_price_value if page.column == 'price_amount' else None)
+
+
+def _price_list_params():
+    """(sort, min_price, max_price) from ?sort=price|price_desc&min_price=&max_price=; ValueError when invalid."""
+    sort = (request.args.get('sort') or '').strip().lower()
+    if sort not in ('', 'price', 'price_desc'):
+        raise ValueError('sort must be price or price_desc')
+    bounds = []
+    for name in ('min_price', 'max_price'):
+        raw = (request.args.get(name) or '').strip().lstrip('£')
+        try:
+            bounds.append(float(raw) if raw else None)
+        except ValueError:
+            raise ValueError(f'{name} must be a number') from None
+    return sort, bounds[0], bounds[1]
+
+
+def _price_list_page(params):
+    """ListPage for a product list: keyed on price_amount when sorting by price, else newest first."""
+    sort = params[0]
+    if sort:
+        return _list_page('price_amount', desc=sort == 'price_desc')
+    return _list_page('created_at', desc=True)
+
+
+def _price_filters(query, params):
+    """Filter on price_amount (indexed; the lower end of a range). Ordering comes from _price_list_page."""
+    _, min_price, max_price = params
+    if min_price is not None:
+        query = query.gte('price_amount', min_price)
+    if max_price is not None:
+        query = query.lte('price_amount', max_price)
+    return query
+
+
+def _price_value(row):
+    """Numeric price of a row: price_amount, else parsed from the price text."""
+    if row.get('price_amount') is not None:
+        return float(row['price_amount'])
+    return price_refresh.price_amount(row.get('price'))
+
+
+def _price_ordered_rows(rows, params, parse=False):
+    """Unpriced rows last (Postgres sorts NULLs first when descending).
+
+    With parse=True (rows fetched without the price query, e.g. legacy fallbacks) the filter and sort
+    are applied here from the parsed price text instead.
+    """
+    sort, min_price, max_price = params
+    if parse:
+        amount = _price_value
+        if min_price is not None or max_price is not None:
+            rows = [
+                row for row in rows
+                if amount(row) is not None
+                and (min_price is None or amount(row) >= min_price)
+                and (max_price is None or amount(row) <= max_price)
+            ]
+        if sort:
+            priced = sorted((row for row in rows if amount(row) is not None), key=amount, reverse=sort == 'price_desc')
+            return priced + [row for row in rows if amount(row) is None]
+        return rows
+    if sort:
+        rows.sort(key=lambda row: row.get('price_amount') is None)
+    return rows
+
+
+# ---------- Room keys ----------
+# ha_products.room_key is the room name normalised to a slug ('Bathroom 1' -> 'bathroom-1'), written with
+# room (tables/ha_products_add_room_key.sql). Room tabs match it by prefix, so 'bathroom' covers
+# 'Bathroom 1' and 'Kitchen' covers 'Kitchen / Dining'. Extra rooms a tab includes live in ha_room_aliases;
+# these built-in ones are used when that table is missing or empty.
+ROOM_ALIASES = {
+    # Highgate Living Room also shows Muswell Hill-equivalent rooms.
+    'living-room': ['front-room', 'kitchen'],
+}
+ROOM_ALIASES_TTL = float(os.getenv('ROOM_ALIASES_TTL', '300'))
+_room_aliases_cache = {'at': 0.0, 'aliases': None}
+_room_aliases_lock = threading.Lock()
+
+
+def _room_key(room):
+    """Slug used for ha_products.room_key: lower case, runs of other characters -> '-'. None when blank."""
+    key = re.sub(r'[^a-z0-9]+', '-', (room or '').lower()).strip('-')
+    return key or None
+
+
+def _with_room_key(payload):
+    """payload plus room_key derived from its room, when room is being written."""
+    if 'room' in payload:
+        payload['room_key'] = _room_key(payload['room'])
+    return payload
+
+
+def _room_aliases():
+    """{room_key: [alias room_key, ...]} from ha_room_aliases (cached), else ROOM_ALIASES."""
+    with _room_aliases_lock:
+        cached = _room_aliases_cache['aliases']
+        if cached is not None and time.monotonic() - _room_aliases_cache['at'] < ROOM_ALIASES_TTL:
+            return cached
+    aliases = {}
+    try:
+        r = supabase.table('ha_room_aliases').select('room_key, alias_key').execute()
+        for row in r.data or []:
+            room_key, alias_key = _room_key(row.get('room_key')), _room_key(row.get('alias_key'))
+            if room_key and alias_key:
+                aliases.setdefault(room_key, []).append(alias_key)
+    except Exception as e:
+        app.logger.info(f"ha_room_aliases not available ({e}), using built-in room aliases")
+    aliases = aliases or ROOM_ALIASES
+    with _room_aliases_lock:
+        _room_aliases_cache.update(at=time.monotonic(), aliases=aliases)
+    return aliases
+
+
+def _room_prefixes(room):
+    """room_key prefixes a room tab matches: its own key plus its aliases."""
+    key = _room_key(room)
+    if not key:
+        return []
+    return [key] + [alias for alias in _room_aliases().get(key, []) if alias != key]
+
+
+def _room_matches(row, prefixes):
+    """Python equivalent of _apply_room_prefixes for rows already in memory."""
+    key = _room_key(row.get('room')) or ''
+    return any(key.startswith(prefix) for prefix in prefixes)
+
+
+def _or_filter(query, conditions):
+    """PostgREST or=(...) filter; the postgrest-py pinned by supabase 2.0 has no or_()."""
+    query.params = query.params.add('or', f"({','.join(conditions)})")
+    return query
+
+
+def _apply_room_prefixes(query, prefixes):
+    """Indexed prefix match on room_key (slugs need no PostgREST quoting)."""
+    if len(prefixes) == 1:
+        return query.like('room_key', f'{prefixes[0]}*')
+    return _or_filter(query, [f'room_key.like.{prefix}*' for prefix in prefixes])
+
+
 def _normalize_product_tags(tags, ensure=None):
     if isinstance(tags, list):
         out = [str(t).strip() for t in tags if str(t).strip()]
@@ -2688,39 +3684,53 @@ def _normalize_product_tags(tags, ensure=None):
 
 @app.route('/api/products')
 def get_products():
-    """List products from ha_products. Optional query: room=, tag=, category=."""
+    """List products from ha_products. Optional query: room=, tag=, category=, sort=price|price_desc, min_price=, max_price=, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        query = supabase.table('ha_products').select('*').order('created_at', desc=True)
-        room = request.args.get('room', '').strip()
-        category = request.args.get('category', '').strip()
+        price_params = _price_list_params()
+        page = _price_list_page(price_params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    category = request.args.get('category', '').strip()
+    tag = request.args.get('tag', '').strip().lower()
+
+    def where(query):
+        query = _price_filters(query, price_params)
         if category:
             query = query.eq('category', category)
-        tag = request.args.get('tag', '').strip().lower()
         if tag:
-            query = query.overlaps('tags', [tag])
-        r = query.execute()
-        rows = r.data or []
+            # postgrest-py has no overlaps(); ov() takes array-literal items, so quote the tag. The array match is
+            # case-sensitive (the cache path is not): also try the usual capitalisations of hand-typed tags.
+            variants = dict.fromkeys([tag, tag.capitalize(), tag.title(), tag.upper()])
+            query = query.ov('tags', ['"' + t.replace('\\', '\\\\').replace('"', '\\"') + '"' for t in variants])
+        return query
 
-        if room:
-            # Room tabs (e.g. /designs/bathroom/) use generic room names.
-            # In the DB we sometimes store more specific variants like "Bathroom 1", "Bedroom 2".
-            # Filtering with Supabase `or` + `ilike` can be brittle (encoding/escaping), so do it in Python.
-            # Some Highgate rooms also include Muswell Hill-equivalent room names
-            # (e.g. Living Room should include MWH "Front Room" products).
-            room_aliases = {
-                'living room': ['living room', 'front room', 'kitchen'],
-            }
-            room_l = room.strip().lower()
-            prefixes = room_aliases.get(room_l, [room_l])
-            def _room_match(v):
-                vv = (v or '').strip().lower()
-                # Treat specific stored variants (e.g. "Kitchen / Dining", "Bathroom 1") as part of the room tab.
-                return any(vv == p or vv.startswith(p) for p in prefixes)
-            rows = [row for row in rows if _room_match(row.get('room'))]
-
-        return jsonify(rows), 200
+    try:
+        # Room tabs (e.g. /designs/bathroom/) use generic room names; stored rooms are often more
+        # specific ("Bathroom 1", "Kitchen / Dining"), hence the prefix match on room_key.
+        prefixes = _room_prefixes(request.args.get('room', ''))
+        if PRODUCT_CACHE.enabled:
+            candidates = PRODUCT_CACHE.tag_search(TagQuery(all_of=[tag]))[0] if tag else PRODUCT_CACHE.rows()
+            rows = [
+                row for row in candidates
+                if (not category or row.get('category') == category)
+                and (not prefixes or _room_matches(row, prefixes))
+            ]
+            # Already in the page's (parsed price) order: the stored price_amount pass below would disagree with it.
+            return _list_response(_page_loaded_rows(_price_ordered_rows(rows, price_params, parse=True), page), page)
+        if not prefixes:
+            rows = _list_rows('ha_products', page, where, needs=('room',))
+        else:
+            try:
+                rows = _list_rows('ha_products', page, lambda q: _apply_room_prefixes(where(q), prefixes), needs=('room',))
+            except Exception as e:
+                if 'room_key' not in str(e):
+                    raise
+                app.logger.warning(f"ha_products.room_key missing, run tables/ha_products_add_room_key.sql: {e}")
+                rows = [row for row in _list_rows('ha_products', page, where, needs=('room',)) if _room_matches(row, prefixes)]
+
+        return _list_response(_price_ordered_rows(rows, price_params), page)
     except Exception as e:
         app.logger.error(f"Error fetching products: {e}")
         return jsonify([]), 200
@@ -2736,14 +3746,8 @@ def create_product():
         link = (data.get('link') or '').strip()
         if not link:
             return jsonify({'error': 'Link is required'}), 400
-        tags = data.get('tags')
-        if isinstance(tags, list):
-            tags = [str(t).strip() for t in tags if str(t).strip()]
-        elif isinstance(tags, str):
-            tags = [t.strip() for t in tags.split(',') if t.strip()]
-        else:
-            tags = []
-        tag_set_lower = { str(t).strip().lower() for t in tags }
+        tags = _normalize_product_tags(data.get('tags'))
+        tag_set_lower = { normalize_tag(t) for t in tags }
         is_mwh = data.get('is_mwh')
         if is_mwh is None:
             is_mwh = 'mwh' in tag_set_lower
@@ -2782,8 +3786,13 @@ def create_product():
             payload['is_present'] = _coerce_bool(data.get('is_present'), default=False)
         if 'is_baby' in data:
             payload['is_baby'] = _coerce_bool(data.get('is_baby'), default=False)
-        r = supabase.table('ha_products').insert(payload).execute()
+        r = _execute_product_write(
+            supabase.table('ha_products').insert,
+            _with_room_key(_with_price_columns(payload)),
+        )
         rows = r.data or []
+        if rows:
+            _schedule_product_thumbs(rows[0])
         return jsonify(rows[0] if rows else payload), 201
     except Exception as e:
         app.logger.error(f"Error creating product: {e}")
@@ -2865,13 +3874,148 @@ def update_product(product_id):
             )
         if not update_data:
             return jsonify({'error': 'No fields to update'}), 400
-        r = supabase.table('ha_products').update(update_data).eq('id', product_id).execute()
+        r = _execute_product_write(
+            lambda payload: supabase.table('ha_products').update(payload).eq('id', product_id),
+            _with_room_key(_with_price_columns(update_data)),
+        )
         rows = r.data or []
+        if rows:
+            _schedule_product_thumbs(rows[0])
         return jsonify(rows[0] if rows else update_data), 200
     except Exception as e:
         app.logger.error(f"Error updating product: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/products/<int:product_id>/price-history')
+def get_product_price_history(product_id):
+    """Price changes found by the price refresher (oldest first) and the overall trend for one product."""
+    if not supabase:
+        return jsonify({'error': 'Database not available'}), 503
+    try:
+        r = supabase.table('ha_products').select('id, price, price_checked_at').eq('id', product_id).execute()
+        rows = r.data or []
+        if not rows:
+            return jsonify({'error': 'Product not found'}), 404
+        product = rows[0]
+        h = (
+            supabase.table(price_refresh.HISTORY_TABLE)
+            .select('price, previous_price, source, checked_at')
+            .eq('product_id', product_id)
+            .order('checked_at')
+            .execute()
+        )
+        history = h.data or []
+        return jsonify({
+            'product_id': product_id,
+            'price': product.get('price'),
+            'price_checked_at': product.get('price_checked_at'),
+            'history': history,
+            'trend': price_refresh.price_trend(product.get('price'), history),
+        }), 200
+    except Exception as e:
+        app.logger.error(f"Error fetching price history: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Price refresh: re-scrape unbought products' prices, one visit per retailer host every PRICE_REFRESH_HOST_INTERVAL
+# seconds, skipping products checked within PRICE_REFRESH_MIN_AGE_HOURS. Meant for a scheduler (cron / Cloud
+# Scheduler) calling POST /api/products/refresh-prices?async=1, or scripts/refresh_prices.py.
+PRICE_REFRESH_BATCH = int(os.getenv('PRICE_REFRESH_BATCH', '20'))
+
+
+def _price_refresher():
+    return price_refresh.PriceRefresher(
+        supabase,
+        _fetch_product_preview,
+        host_interval=float(os.getenv('PRICE_REFRESH_HOST_INTERVAL', '20')),
+        min_age=timedelta(hours=float(os.getenv('PRICE_REFRESH_MIN_AGE_HOURS', '24'))),
+    )
+
+
+def _run_price_refresh(limit, dry_run):
+    """One refresher batch; the refresher writes ha_products directly, so reload PRODUCT_CACHE afterwards."""
+    try:
+        return _price_refresher().run(limit=limit, dry_run=dry_run)
+    finally:
+        if not dry_run:
+            PRODUCT_CACHE.invalidate()
+
+
+@app.route('/api/products/refresh-prices', methods=['POST'])
+def refresh_product_prices():
+    """POST - re-check the prices of the most overdue unbought products. Optional: limit=, dry_run=, async=1."""
+    if not supabase:
+        return jsonify({'error': 'Database not available'}), 503
+    body = request.get_json(silent=True) if request.is_json else None
+    body = body if isinstance(body, dict) else {}
+    try:
+        limit = int(request.args.get('limit') or body.get('limit') or PRICE_REFRESH_BATCH)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be a number'}), 400
+    limit = max(1, min(limit, 200))
+    dry_run = _coerce_bool(request.args.get('dry_run') or body.get('dry_run'))
+    return _scrape_response(
+        'price_refresh',
+        lambda: (_run_price_refresh(limit, dry_run), 200),
+        {'limit': limit, 'dry_run': dry_run},
+    )
+
+
+# ---------- Product image thumbnails ----------
+# After a product is saved its image_url is resized to small / medium WebP thumbnails in the background
+# (tables/ha_products_add_thumbnails.sql). Grids use them only while thumb_source_url == image_url.
+PRODUCT_THUMBS_ENABLED = _coerce_bool(os.getenv('PRODUCT_THUMBS', '1'), default=True)
+# Thumbnail keys include a hash of the image URL, so a stored object never changes.
+_THUMB_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _store_product_thumb(key, data, content_type):
+    """Upload one thumbnail to the image bucket (Supabase storage when its S3 keys are set, else GCS); returns its URL."""
+    if SUPABASE_ACCESS_KEY_ID and SUPABASE_SECRET_ACCESS_KEY:
+        upload_to_supabase_storage_s3(data, key, content_type, cache_control=_THUMB_CACHE_CONTROL)
+        return f"{SUPABASE_URL.rstrip('/')}/storage/v1/object/public/image_hosting_bucket/{key}"
+    if gcp_bucket is not None:
+        blob = gcp_bucket.blob(key)
+        blob.cache_control = _THUMB_CACHE_CONTROL
+        blob.upload_from_string(data, content_type=content_type)
+        # The public object URL, not /api/image/, so browsers fetch it directly and keep the immutable header.
+        return f"https://storage.googleapis.com/{gcp_bucket.name}/{quote(key)}"
+    raise ValueError('No image bucket configured for thumbnails')
+
+
+def _refresh_product_thumbs(product_id, image_url):
+    """Build and record thumbnails of image_url unless the product has moved on or already has them."""
+    r = supabase.table('ha_products').select('image_url, thumb_source_url').eq('id', product_id).execute()
+    rows = r.data or []
+    if not rows or (rows[0].get('image_url') or '').strip() != image_url or rows[0].get('thumb_source_url') == image_url:
+        return False
+    urls = product_thumbs.build_thumbnails(product_id, image_url, _store_product_thumb)
+    r = supabase.table('ha_products').update({**urls, 'thumb_source_url': image_url}).eq('id', product_id).execute()
+    for row in r.data or []:
+        PRODUCT_CACHE.upsert(row)
+    return True
+
+
+def _schedule_product_thumbs(row):
+    """Queue thumbnail generation for a just-saved product row on the scrape bulkhead (best effort)."""
+    if not PRODUCT_THUMBS_ENABLED or not supabase or not row.get('id'):
+        return
+    image_url = (row.get('image_url') or '').strip()
+    if not image_url.startswith(('http://', 'https://')) or row.get('thumb_source_url') == image_url:
+        return
+
+    def run():
+        try:
+            _refresh_product_thumbs(row['id'], image_url)
+        except Exception as e:
+            app.logger.warning(f"Thumbnails failed for product {row['id']} ({image_url[:80]}): {e}")
+
+    try:
+        SCRAPE_BULKHEAD.submit(run)
+    except BulkheadFull:
+        app.logger.warning(f"Scrape bulkhead full, skipping thumbnails for product {row['id']}")
+
+
 @app.route('/api/products/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
     """Delete a product."""
@@ -2879,25 +4023,51 @@ def delete_product(product_id):
         return jsonify({'error': 'Database not available'}), 503
     try:
         supabase.table('ha_products').delete().eq('id', product_id).execute()
+        PRODUCT_CACHE.remove(product_id)
         return '', 204
     except Exception as e:
         app.logger.error(f"Error deleting product: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+def _flagged_product_rows(column, legacy_match, page, price_params, needs=()):
+    """Products with column (is_present / is_baby) true, price-filtered, ordered and paged.
+
+    Served from PRODUCT_CACHE when enabled. Otherwise queried, falling back to legacy_match over every
+    row when the column does not exist yet.
+    """
+    if PRODUCT_CACHE.enabled:
+        rows = [row for row in PRODUCT_CACHE.rows() if _has_product_flag(row, column, legacy_match)]
+        return _page_loaded_rows(_price_ordered_rows(rows, price_params, parse=True), page)
+    try:
+        rows = _list_rows(
+            'ha_products', page,
+            lambda q: _price_filters(q.eq(column, True), price_params),
+            needs=needs,
+        )
+        return _price_ordered_rows(rows, price_params)
+    except Exception as col_err:
+        app.logger.info(f"{column} query failed ({col_err}), using legacy filter")
+        all_rows = fetch_all_rows(supabase, 'ha_products', order='created_at.desc,id.desc')
+        rows = [row for row in all_rows if legacy_match(row)]
+        return _page_loaded_rows(_price_ordered_rows(rows, price_params, parse=True), page)
+
+
 @app.route('/api/presents')
 def get_presents():
-    """Products with is_present=true. Optional query: person=, category=, source= (website_name)."""
+    """Products with is_present=true. Optional query: person=, category=, source= (website_name), sort=, min_price=, max_price=, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        try:
-            r = supabase.table('ha_products').select('*').eq('is_present', True).order('created_at', desc=True).execute()
-            rows = r.data or []
-        except Exception as col_err:
-            app.logger.info(f"Presents is_present query failed ({col_err}), using legacy filter")
-            r = supabase.table('ha_products').select('*').order('created_at', desc=True).execute()
-            rows = [row for row in (r.data or []) if _is_present_product(row)]
+        price_params = _price_list_params()
+        page = _price_list_page(price_params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        rows = _flagged_product_rows(
+            'is_present', _is_present_product, page, price_params,
+            needs=('present_for', 'category', 'website_name'),
+        )
         person = (request.args.get('person') or '').strip()
         category = (request.args.get('category') or '').strip()
         source = (request.args.get('source') or '').strip()
@@ -2913,7 +4083,7 @@ def get_presents():
                 rows = [row for row in rows if not (row.get('website_name') or '').strip()]
             else:
                 rows = [row for row in rows if (row.get('website_name') or '').strip() == source]
-        return jsonify(rows), 200
+        return _list_response(rows, page)
     except Exception as e:
         app.logger.error(f"Error fetching presents: {e}")
         return jsonify([]), 200
@@ -2953,15 +4123,18 @@ def create_present():
             'comment': (data.get('comment') or '').strip() or None,
             'present_for': (data.get('present_for') or '').strip() or None,
         }
+        _with_room_key(_with_price_columns(payload))
         try:
-            r = supabase.table('ha_products').insert(payload).execute()
+            r = _execute_product_write(supabase.table('ha_products').insert, payload)
         except Exception as insert_err:
             if 'is_present' in str(insert_err).lower() or 'PGRST' in str(insert_err):
                 payload.pop('is_present', None)
-                r = supabase.table('ha_products').insert(payload).execute()
+                r = _execute_product_write(supabase.table('ha_products').insert, payload)
             else:
                 raise
         rows = r.data or []
+        if rows:
+            _schedule_product_thumbs(rows[0])
         return jsonify(rows[0] if rows else payload), 201
     except Exception as e:
         app.logger.error(f"Error creating present: {e}")
@@ -2970,17 +4143,19 @@ def create_present():
 
 @app.route('/api/baby-products')
 def get_baby_products():
-    """Baby products (is_baby). Optional query: type= (sub_category), source=, room=."""
+    """Baby products (is_baby). Optional query: type= (sub_category), source=, room=, sort=, min_price=, max_price=, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        try:
-            r = supabase.table('ha_products').select('*').eq('is_baby', True).order('created_at', desc=True).execute()
-            rows = r.data or []
-        except Exception as col_err:
-            app.logger.info(f'Baby is_baby query failed ({col_err}), using legacy filter')
-            r = supabase.table('ha_products').select('*').order('created_at', desc=True).execute()
-            rows = [row for row in (r.data or []) if _is_baby_product(row)]
+        price_params = _price_list_params()
+        page = _price_list_page(price_params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        rows = _flagged_product_rows(
+            'is_baby', _is_baby_product, page, price_params,
+            needs=('sub_category', 'website_name', 'room'),
+        )
         baby_type = (request.args.get('type') or request.args.get('sub_category') or '').strip()
         source = (request.args.get('source') or '').strip()
         room = (request.args.get('room') or '').strip()
@@ -3000,7 +4175,7 @@ def get_baby_products():
             else:
                 rl = room.lower()
                 rows = [row for row in rows if (row.get('room') or '').strip().lower() == rl]
-        return jsonify(rows), 200
+        return _list_response(rows, page)
     except Exception as e:
         app.logger.error(f"Error fetching baby products: {e}")
         return jsonify([]), 200
@@ -3038,15 +4213,18 @@ def create_baby_product():
         present_for = (data.get('present_for') or '').strip()
         if present_for:
             payload['present_for'] = present_for
+        _with_room_key(_with_price_columns(payload))
         try:
-            r = supabase.table('ha_products').insert(payload).execute()
+            r = _execute_product_write(supabase.table('ha_products').insert, payload)
         except Exception as insert_err:
             if 'is_baby' in str(insert_err).lower() or 'PGRST' in str(insert_err):
                 payload.pop('is_baby', None)
-                r = supabase.table('ha_products').insert(payload).execute()
+                r = _execute_product_write(supabase.table('ha_products').insert, payload)
             else:
                 raise
         rows = r.data or []
+        if rows:
+            _schedule_product_thumbs(rows[0])
         return jsonify(rows[0] if rows else payload), 201
     except Exception as e:
         app.logger.error(f"Error creating baby product: {e}")
@@ -3054,15 +4232,10 @@ def create_baby_product():
 
 
 def _muswell_hill_product_match(row):
-    """True if row belongs on Muswell Hill products: is_mwh, tag mwh, or project Muswell Hill."""
+    """True if row belongs on Muswell Hill products: is_mwh, tag mwh, or project Muswell Hill (stored as ha_products.in_mwh)."""
     if _coerce_bool(row.get('is_mwh'), default=False):
         return True
-    tags = row.get('tags')
-    if isinstance(tags, list):
-        tag_set = { str(t).strip().lower() for t in tags }
-        if 'mwh' in tag_set:
-            return True
-    elif tags and 'mwh' in str(tags).lower():
+    if 'mwh' in row_tags(row):
         return True
     project = (row.get('project') or '').strip().lower()
     if project == 'muswell hill':
@@ -3070,75 +4243,72 @@ def _muswell_hill_product_match(row):
     return False
 
 def _hk_product_match(row):
-    """True if row is HK only: tags contains hk OR category is HK."""
+    """True if row is HK only: tags contains hk OR category is HK (stored as ha_products.in_hk)."""
     # Check category first
     category = (row.get('category') or '').strip()
     if category.lower() == 'hk':
         return True
     # Check tags
-    tags = row.get('tags')
-    if isinstance(tags, list):
-        tag_set = { str(t).strip().lower() for t in tags }
-        if 'hk' in tag_set:
-            return True
-    elif tags and 'hk' in str(tags).lower():
-        return True
-    return False
+    return 'hk' in row_tags(row)
+
+
+_MEMBERSHIP_MATCHES = {'in_mwh': _muswell_hill_product_match, 'in_hk': _hk_product_match}
+
+
+def _project_product_rows(column, room):
+    """Products with membership flag column (in_mwh / in_hk) set, newest first; room matches room_key exactly.
+
+    One indexed query (or the product cache when enabled) instead of filtering every row in Python. Until
+    tables/ha_products_add_membership.sql (or ha_products_add_room_key.sql) has been run, falls back to the
+    Python membership rules over every row.
+    """
+    key = _room_key(room)
+    legacy_match = _MEMBERSHIP_MATCHES[column]
+
+    def in_room(row):
+        return not key or _room_key(row.get('room')) == key
+
+    if PRODUCT_CACHE.enabled:
+        rows = [row for row in PRODUCT_CACHE.rows() if _has_product_flag(row, column, legacy_match) and in_room(row)]
+        rows.sort(key=lambda row: (row.get('created_at') or '', row.get('id') or 0), reverse=True)
+        return rows
+
+    def where(query):
+        query = query.eq(column, True)
+        return query.eq('room_key', key) if key else query
+
+    try:
+        return fetch_all_rows(supabase, 'ha_products', where=where, order='created_at.desc,id.desc')
+    except Exception as e:
+        if column not in str(e) and 'room_key' not in str(e):
+            raise
+        migration = 'ha_products_add_membership.sql' if column in str(e) else 'ha_products_add_room_key.sql'
+        app.logger.warning(f"ha_products.{column} / room_key query failed, run tables/{migration}: {e}")
+        all_rows = fetch_all_rows(supabase, 'ha_products', order='created_at.desc,id.desc')
+        return [row for row in all_rows if legacy_match(row) and in_room(row)]
 
 
 @app.route('/api/muswell-hill-products')
 def get_muswell_hill_products():
-    """Products for Muswell Hill: MWH only (is_mwh true or tag mwh). Optional ?room=kitchen filters to that room."""
+    """Products for Muswell Hill (in_mwh: is_mwh, tag mwh or project Muswell Hill). Optional ?room=kitchen filters to that room."""
     if not supabase:
         return jsonify([]), 200
-    room_filter = (request.args.get('room') or '').strip().lower()
     try:
-        # 1) Try RPC when available. If it returns [], still use Python path below: RPC SQL may be
-        #    older than app logic (e.g. missing project=muswell hill), or RLS may differ.
-        try:
-            r = supabase.rpc('get_muswell_hill_products').execute()
-            if r and getattr(r, 'data', None) is not None:
-                out = list(r.data) if isinstance(r.data, list) else []
-                if room_filter:
-                    out = [row for row in out if (row.get('room') or '').strip().lower() == room_filter]
-                if len(out) > 0:
-                    return jsonify(out), 200
-        except Exception as e:
-            app.logger.info(f"Muswell Hill RPC not available: {e}, using fetch-all filter")
-        # 2) Fallback: fetch all products, filter in Python (canonical filter for this app)
-        r = supabase.table('ha_products').select('*').execute()
-        all_rows = (r.data or []) if (r and hasattr(r, 'data')) else []
-        if not isinstance(all_rows, list):
-            all_rows = []
-        out = [row for row in all_rows if _muswell_hill_product_match(row)]
-        if room_filter:
-            out = [row for row in out if (row.get('room') or '').strip().lower() == room_filter]
-        out.sort(key=lambda row: (row.get('created_at') or ''), reverse=True)
-        return jsonify(out), 200
+        return jsonify(_project_product_rows('in_mwh', request.args.get('room'))), 200
     except Exception as e:
-        app.logger.error(f"Error fetching Muswell Hill products: {e}")
+        app.logger.error(f"Error fetching Muswell Hill products (run tables/ha_products_add_membership.sql?): {e}")
         return jsonify([]), 200
 
 
 @app.route('/api/hk-products')
 def get_hk_products():
-    """Products for HK: HK only (tag hk OR category HK). Optional ?room=kitchen filters to that room."""
+    """Products for HK (in_hk: tag hk or category HK). Optional ?room=kitchen filters to that room."""
     if not supabase:
         return jsonify([]), 200
-    room_filter = (request.args.get('room') or '').strip().lower()
-    try:
-        # Fetch all products, filter in Python for HK tag
-        r = supabase.table('ha_products').select('*').execute()
-        all_rows = (r.data or []) if (r and hasattr(r, 'data')) else []
-        if not isinstance(all_rows, list):
-            all_rows = []
-        out = [row for row in all_rows if _hk_product_match(row)]
-        if room_filter:
-            out = [row for row in out if (row.get('room') or '').strip().lower() == room_filter]
-        out.sort(key=lambda row: (row.get('created_at') or ''), reverse=True)
-        return jsonify(out), 200
+    try:
+        return jsonify(_project_product_rows('in_hk', request.args.get('room'))), 200
     except Exception as e:
-        app.logger.error(f"Error fetching HK products: {e}")
+        app.logger.error(f"Error fetching HK products (run tables/ha_products_add_membership.sql?): {e}")
         return jsonify([]), 200
 
 
@@ -3423,24 +4593,31 @@ def _resolve_coords(data, existing=None):
 
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """List events from ha_events. Optional query: city=, type=, status=, upcoming=1."""
+    """List events from ha_events. Optional query: city=, type=, status=, upcoming=1, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        query = supabase.table('ha_events').select('*').order('starts_at', desc=False)
+        page = _list_page('starts_at')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         city = request.args.get('city', '').strip().lower()
-        if city:
-            query = query.eq('city', city)
         type_ = request.args.get('type', '').strip().lower()
-        if type_ and type_ in EVENT_TYPES:
-            query = query.eq('type', type_)
         status = request.args.get('status', '').strip().lower()
-        if status and status in EVENT_STATUSES:
-            query = query.eq('status', status)
-        if request.args.get('upcoming') == '1':
-            query = query.gte('starts_at', datetime.now(timezone.utc).isoformat())
-        r = query.execute()
-        return jsonify(r.data or []), 200
+        since = datetime.now(timezone.utc).isoformat() if request.args.get('upcoming') == '1' else None
+
+        def where(query):
+            if city:
+                query = query.eq('city', city)
+            if type_ and type_ in EVENT_TYPES:
+                query = query.eq('type', type_)
+            if status and status in EVENT_STATUSES:
+                query = query.eq('status', status)
+            if since:
+                query = query.gte('starts_at', since)
+            return query
+
+        return _list_response(_list_rows('ha_events', page, where), page)
     except Exception as e:
         app.logger.error(f"Error fetching events: {e}")
         return jsonify([]), 200
@@ -3551,15 +4728,20 @@ def delete_event(event_id):
 @app.route('/api/import/event-url', methods=['POST'])
 def import_event_listing_url():
     """POST JSON { url } — supports dice.fm and songkick.com concert pages; returns { event, place }."""
-    try:
-        from dice_import import fetch_dice_event, place_payload_from_dice_event
-    except ImportError as e:
-        app.logger.error('dice_import unavailable: %s', e)
-        return jsonify({'error': 'Import helper not available'}), 503
     data = request.get_json() or {}
     url = (data.get('url') or '').strip()
     if not url:
         return jsonify({'error': 'url is required'}), 400
+    return _scrape_response('event_import', lambda: _event_import_result(url), {'url': url})
+
+
+def _event_import_result(url):
+    """(body, status) for /api/import/event-url; also run as a background scrape job."""
+    try:
+        from dice_import import fetch_dice_event, place_payload_from_dice_event
+    except ImportError as e:
+        app.logger.error('dice_import unavailable: %s', e)
+        return {'error': 'Import helper not available'}, 503
     host = (urlparse(url).netloc or '').lower()
     try:
         if 'songkick.com' in host:
@@ -3567,44 +4749,52 @@ def import_event_listing_url():
                 from songkick_import import fetch_songkick_event
             except ImportError as e:
                 app.logger.error('songkick_import unavailable: %s', e)
-                return jsonify({'error': 'Songkick import not available'}), 503
+                return {'error': 'Songkick import not available'}, 503
             ev = fetch_songkick_event(url)
         elif 'dice.fm' in host:
             ev = fetch_dice_event(url)
         else:
-            return jsonify({'error': 'Unsupported URL. Use a dice.fm or songkick.com concert link.'}), 400
+            return {'error': 'Unsupported URL. Use a dice.fm or songkick.com concert link.'}, 400
         place = place_payload_from_dice_event(ev)
-        return jsonify({'event': ev, 'place': place}), 200
+        return {'event': ev, 'place': place}, 200
     except ValueError as e:
-        return jsonify({'error': str(e)}), 400
+        return {'error': str(e)}, 400
     except RuntimeError as e:
-        return jsonify({'error': str(e)}), 400
+        return {'error': str(e)}, 400
     except Exception as e:
         app.logger.exception('import_event_listing_url failed')
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}, 500
 
 
 # ---------- Things to do (ha_things_to_do) ----------
 
 @app.route('/api/things-to-do', methods=['GET'])
 def get_things_to_do():
-    """List places from ha_things_to_do. Optional query: city=, category=, attended=1, booked=1."""
+    """List places from ha_things_to_do. Optional query: city=, category=, attended=1, booked=1, limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        query = supabase.table('ha_things_to_do').select('*').order('created_at', desc=True)
+        page = _list_page('created_at', desc=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         city = request.args.get('city', '').strip().lower()
-        if city:
-            query = query.eq('city', city)
         category = request.args.get('category', '').strip()
-        if category:
-            query = query.eq('category', category)
-        if request.args.get('attended') == '1':
-            query = query.eq('attended', True)
-        if request.args.get('booked') == '1':
-            query = query.eq('booked', True)
-        r = query.execute()
-        return jsonify(r.data or []), 200
+        attended = request.args.get('attended') == '1'
+        booked = request.args.get('booked') == '1'
+
+        def where(query):
+            if city:
+                query = query.eq('city', city)
+            if category:
+                query = query.eq('category', category)
+            if attended:
+                query = query.eq('attended', True)
+            if booked:
+                query = query.eq('booked', True)
+            return query
+
+        return _list_response(_list_rows('ha_things_to_do', page, where), page)
     except Exception as e:
         app.logger.error(f"Error fetching things-to-do: {e}")
         return jsonify([]), 200
@@ -3706,7 +4896,7 @@ def _parse_google_maps_url(url):
     host = urlparse(url).netloc.lower()
     if 'goo.gl' in host or 'maps.app' in host:
         try:
-            resp = requests.get(url, allow_redirects=True, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
+            resp = scrape_http.get(url, timeout=10, headers={'User-Agent': 'Mozilla/5.0'})
             final_url = resp.url
         except Exception:
             pass
@@ -3741,24 +4931,30 @@ def restaurant_preview():
         return jsonify({'error': 'url is required'}), 400
     if not url.startswith(('http://', 'https://')):
         return jsonify({'error': 'Invalid URL'}), 400
+    return _scrape_response('restaurant_preview', lambda: _restaurant_preview_result(url), {'url': url})
+
+
+def _restaurant_preview_result(url):
+    """(body, status) for /api/restaurants/preview; also run as a background scrape job."""
     data = _parse_google_maps_url(url)
     if not data:
-        return jsonify({'error': 'Could not extract details from this URL'}), 400
-    return jsonify(data), 200
+        return {'error': 'Could not extract details from this URL'}, 400
+    return data, 200
 
 
 @app.route('/api/restaurants', methods=['GET'], strict_slashes=False)
 def get_restaurants():
-    """List all restaurants. ?day=monday returns only those with a deal on that day."""
+    """List all restaurants. ?day=monday returns only those with a deal on that day. Optional limit=, cursor=, fields=."""
     if not supabase:
         return jsonify([]), 200
     try:
-        query = supabase.table('ha_restaurants').select('*').order('name')
+        page = _list_page('name')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
         day = (request.args.get('day') or '').strip().lower()
-        if day and day in DAYS_OF_WEEK:
-            query = query.cs('deal_days', [day])
-        r = query.execute()
-        return jsonify(r.data or []), 200
+        where = (lambda q: q.cs('deal_days', [day])) if day and day in DAYS_OF_WEEK else None
+        return _list_response(_list_rows('ha_restaurants', page, where), page)
     except Exception as e:
         app.logger.error(f'Error fetching restaurants: {e}')
         return jsonify([]), 200
@@ -0,0 +1,126 @@
+"""
+Bulkhead for outbound-scrape work: a dedicated bounded thread pool with a queue limit.
+Slow retailers can only tie up this pool; when it is saturated, new scrape requests are refused
+at once (BulkheadFull -> 503 + Retry-After) instead of piling onto the gunicorn threads that
+also serve /api/products and the pages.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class BulkheadFull(Exception):
+    """Raised when the bulkhead has no worker and no queue slot left."""
+
+    def __init__(self, name: str, retry_after: int) -> None:
+        super().__init__(f"{name} is busy; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """ThreadPoolExecutor with admission control.
+
+    max_workers tasks run at once and at most max_queue more wait for a worker. run() (a request
+    thread waiting on the result) is additionally capped at max_waiters so scrapes can never
+    occupy every request thread of the web worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue: int = 8,
+        max_waiters: int | None = None,
+        retry_after: int = 5,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_waiters = max_waiters
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        # Notified whenever an admitted task finishes (wait_for_capacity).
+        self._freed = threading.Condition(self._lock)
+        self._admitted = 0
+        self._waiters = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._admitted -= 1
+            self.completed += 1
+            self._freed.notify_all()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue fn(*args, **kwargs) or raise BulkheadFull without queueing."""
+        with self._lock:
+            if self._admitted >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise BulkheadFull(self.name, self.retry_after)
+            self._admitted += 1
+        try:
+            # Run in a copy of the caller's context so context variables (e.g. request timers) carry over.
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._admitted -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def wait_for_capacity(self, timeout: float) -> bool:
+        """Block until a submit() could be admitted, at most timeout seconds; False if it still could not."""
+        with self._freed:
+            return self._freed.wait_for(lambda: self._admitted < self.max_workers + self.max_queue, max(0.0, timeout))
+
+    def has_capacity(self) -> bool:
+        """True if a run() could be admitted right now (a hint; admission is decided in submit/waiter)."""
+        with self._lock:
+            if self.max_waiters is not None and self._waiters >= self.max_waiters:
+                return False
+            return self._admitted < self.max_workers + self.max_queue
+
+    def has_waiter_slot(self) -> bool:
+        """True if waiter() could be entered right now (a hint; waiter() decides)."""
+        with self._lock:
+            return self.max_waiters is None or self._waiters < self.max_waiters
+
+    @contextmanager
+    def waiter(self) -> Iterator[None]:
+        """Hold one of the max_waiters request-thread slots, or raise BulkheadFull."""
+        with self._lock:
+            if self.max_waiters is not None and self._waiters >= self.max_waiters:
+                self.rejected += 1
+                raise BulkheadFull(self.name, self.retry_after)
+            self._waiters += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiters -= 1
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """submit() and block the calling thread until the result is ready."""
+        with self.waiter():
+            return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "max_waiters": self.max_waiters,
+                "running": min(self._admitted, self.max_workers),
+                "queued": max(0, self._admitted - self.max_workers),
+                "waiting_requests": self._waiters,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
@@ -0,0 +1,185 @@
+"""
+Per-host circuit breaker for outbound scrapes.
+When a retailer starts bot-blocking (403/429 walls, placeholder pages, timeouts), every preview would
+otherwise walk the whole retry ladder and burn tens of seconds. After a few such outcomes in a short
+window the host's circuit opens and attempts fail fast (CircuitOpen) so the caller can answer from the
+URL alone; after a cooldown one probe is let through (half-open) and its outcome closes or re-opens it.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """Raised by CircuitBreaker.attempt() while the key's circuit is open (or its probe is in flight)."""
+
+    def __init__(self, key: str, retry_after: int) -> None:
+        super().__init__(f"{key} is failing; retry in {retry_after}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class Attempt:
+    """Verdict of one guarded call; leave it unset when the outcome says nothing about the host (e.g. a 404)."""
+
+    def __init__(self) -> None:
+        self.outcome: bool | None = None
+        self.reason: str | None = None
+
+    def success(self) -> None:
+        self.outcome, self.reason = True, None
+
+    def failure(self, reason: str) -> None:
+        self.outcome, self.reason = False, reason
+
+
+class _Circuit:
+    def __init__(self) -> None:
+        self.state = STATE_CLOSED
+        self.failures: deque[float] = deque()
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+        self.last_reason: str | None = None
+        self.trips = 0
+        self.short_circuited = 0
+
+
+class CircuitBreaker:
+    """Independent closed / open / half-open circuits keyed by host.
+
+    A circuit opens after failure_threshold failures within window seconds (a success in between
+    resets the count). It stays open for cooldown seconds, doubling after each failed probe up to
+    max_cooldown, then admits a single half-open probe: success closes it, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        window: float = 300.0,
+        cooldown: float = 120.0,
+        max_cooldown: float = 900.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.window = float(window)
+        self.base_cooldown = float(cooldown)
+        self.max_cooldown = max(float(max_cooldown), self.base_cooldown)
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _admit(self, key: str) -> bool:
+        """True if this caller is the half-open probe; raises CircuitOpen when it may not proceed."""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == STATE_CLOSED:
+                return False
+            if circuit.state == STATE_OPEN and now - circuit.opened_at >= circuit.cooldown:
+                circuit.state = STATE_HALF_OPEN
+            if circuit.state == STATE_HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return True
+            circuit.short_circuited += 1
+            retry_after = max(1, int(circuit.opened_at + circuit.cooldown - now + 0.999))
+        raise CircuitOpen(key, retry_after)
+
+    def _settle(self, key: str, probe: bool, attempt: Attempt) -> None:
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                if attempt.outcome is not False:
+                    return
+                circuit = self._circuits[key] = _Circuit()
+            if probe:
+                circuit.probing = False
+            if attempt.outcome is None:
+                return
+            if attempt.outcome:
+                if circuit.state != STATE_CLOSED:
+                    logger.info("Circuit %s/%s closed", self.name, key)
+                circuit.state = STATE_CLOSED
+                circuit.failures.clear()
+                circuit.cooldown = 0.0
+                return
+
+            circuit.last_reason = attempt.reason
+            if probe or circuit.state == STATE_HALF_OPEN:
+                cooldown = min(max(circuit.cooldown, self.base_cooldown) * 2, self.max_cooldown)
+                self._open(key, circuit, now, cooldown)
+                return
+            if circuit.state == STATE_OPEN:
+                return
+            circuit.failures.append(now)
+            while circuit.failures and circuit.failures[0] <= now - self.window:
+                circuit.failures.popleft()
+            if len(circuit.failures) >= self.failure_threshold:
+                self._open(key, circuit, now, self.base_cooldown)
+
+    def _open(self, key: str, circuit: _Circuit, now: float, cooldown: float) -> None:
+        circuit.state = STATE_OPEN
+        circuit.opened_at = now
+        circuit.cooldown = cooldown
+        circuit.failures.clear()
+        circuit.trips += 1
+        logger.warning("Circuit %s/%s opened for %.0fs (%s)", self.name, key, cooldown, circuit.last_reason)
+
+    @contextmanager
+    def attempt(self, key: str) -> Iterator[Attempt]:
+        """Guard one call to key; raises CircuitOpen (before running the body) while the circuit is open.
+
+        Record the verdict on the yielded Attempt. An exception escaping the body, or no verdict,
+        leaves the circuit as it was (only frees the half-open probe slot).
+        """
+        probe = self._admit(key)
+        attempt = Attempt()
+        try:
+            yield attempt
+        except BaseException:
+            attempt.outcome = None
+            raise
+        finally:
+            self._settle(key, probe, attempt)
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit else STATE_CLOSED
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            circuits = {}
+            for key, circuit in sorted(self._circuits.items()):
+                entry: dict[str, Any] = {
+                    "state": circuit.state,
+                    "recent_failures": len(circuit.failures),
+                    "last_failure": circuit.last_reason,
+                    "trips": circuit.trips,
+                    "short_circuited": circuit.short_circuited,
+                }
+                if circuit.state == STATE_OPEN:
+                    entry["retry_in_seconds"] = max(0, round(circuit.opened_at + circuit.cooldown - now))
+                circuits[key] = entry
+            return {
+                "name": self.name,
+                "failure_threshold": self.failure_threshold,
+                "window_seconds": self.window,
+                "cooldown_seconds": self.base_cooldown,
+                "max_cooldown_seconds": self.max_cooldown,
+                "circuits": circuits,
+            }
@@ -0,0 +1,36 @@
+"""
+Time budget for one multi-step scrape (a product preview: main fetch, retry UA, social / crawler re-fetches).
+Each fetch takes its timeout from what is left of the budget instead of its own fixed 10-25 s, and once
+too little is left further fallbacks are refused (DeadlineExceeded) so the caller can return what it has.
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised by Deadline.timeout() when the budget cannot cover another request."""
+
+
+class Deadline:
+    """A time.monotonic() cut-off. cut_short is set once any step was skipped or stopped early because of it."""
+
+    def __init__(self, budget: float) -> None:
+        self.budget = float(budget)
+        self.at = time.monotonic() + self.budget
+        self.cut_short = False
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.at
+
+    def timeout(self, cap: float, minimum: float = 2.0) -> float:
+        """Timeout for the next request: at most cap, or DeadlineExceeded if less than minimum seconds are left."""
+        left = self.remaining()
+        if left < minimum:
+            self.cut_short = True
+            raise DeadlineExceeded(f"{left:.1f}s left of a {self.budget:.0f}s budget")
+        return min(float(cap), left)
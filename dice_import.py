@@ -9,9 +9,11 @@ import html
 import json
 import re
 from typing import Any, Iterator
-from urllib.error import HTTPError, URLError
 from urllib.parse import quote_plus, urlparse
-from urllib.request import Request, urlopen
+
+import requests
+
+import scrape_http
 
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
@@ -25,20 +27,17 @@ _LD_JSON_SCRIPT_RE = re.compile(
 
 
 def _fetch_html(url: str) -> str:
-    req = Request(
-        url,
-        headers={
-            "User-Agent": USER_AGENT,
-            "Accept-Language": "en-GB,en;q=0.9",
-        },
-    )
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "en-GB,en;q=0.9",
+    }
     try:
-        with urlopen(req, timeout=30) as resp:
-            return resp.read().decode("utf-8", errors="replace")
-    except HTTPError as e:
-        raise RuntimeError(f"HTTP {e.code}: {e.reason}") from e
-    except URLError as e:
-        raise RuntimeError(f"Could not fetch URL: {e.reason}") from e
+        resp = scrape_http.get(url, headers=headers, timeout=30)
+    except requests.RequestException as e:
+        raise RuntimeError(f"Could not fetch URL: {e}") from e
+    if resp.status_code >= 400:
+        raise RuntimeError(f"HTTP {resp.status_code}: {resp.reason}")
+    return resp.content.decode("utf-8", errors="replace")
 
 
 CITY_HINTS: list[tuple[str, str]] = [
@@ -0,0 +1,66 @@
+"""
+Read every row of a Supabase (PostgREST) query. A plain select().execute() stops silently at the
+server's max-rows (1000 on Supabase), so full-table reads page through the result instead: the first
+page asks for the exact row count, then the remaining pages are fetched in parallel.
+Used by the app's list endpoints and fallbacks, price_refresh and the backfill scripts.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Rows per request; keep at or below the PostgREST max-rows setting (a smaller server cap is detected).
+PAGE_SIZE = int(os.getenv("FETCH_ALL_PAGE_SIZE", "1000"))
+# Concurrent page requests after the first one.
+MAX_WORKERS = int(os.getenv("FETCH_ALL_WORKERS", "4"))
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_all_rows(
+    supabase: Any,
+    table: str,
+    columns: str = "*",
+    where: Callable[[Any], Any] | None = None,
+    order: str = "id",
+    page_size: int = PAGE_SIZE,
+    max_workers: int = MAX_WORKERS,
+) -> list[dict[str, Any]]:
+    """All rows of table matching where(query), in order (a PostgREST order value such as 'created_at.desc,id.desc').
+
+    order should end in a unique column so pages neither overlap nor skip rows.
+    """
+
+    def page(offset: int, size: int, count: str | None = None) -> Any:
+        query = supabase.table(table).select(columns, count=count) if count else supabase.table(table).select(columns)
+        if where is not None:
+            query = where(query)
+        return query.order(order).limit(size).offset(offset).execute()
+
+    first = page(0, page_size, count="exact")
+    rows = list(first.data or [])
+    total = getattr(first, "count", None)
+    if len(rows) < page_size and (total is None or total <= len(rows)):
+        return rows
+    # The server may cap pages below page_size: page by what it actually returned.
+    size = len(rows) or page_size
+    if total is None:
+        while True:
+            more = page(len(rows), size).data or []
+            rows.extend(more)
+            if len(more) < size:
+                return rows
+    offsets = list(range(len(rows), total, size))
+    if len(offsets) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(offsets))) as pool:
+            pages = list(pool.map(lambda offset: page(offset, size).data or [], offsets))
+    else:
+        pages = [page(offset, size).data or [] for offset in offsets]
+    for more in pages:
+        rows.extend(more)
+    if len(rows) != total:
+        logger.info("fetch_all_rows(%s): expected %s rows, got %s (table changed while paging)", table, total, len(rows))
+    return rows
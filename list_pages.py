@@ -0,0 +1,205 @@
+"""
+Keyset pagination and column projection for the JSON list endpoints (/api/products, /api/presents,
+/api/baby-products, /api/events, /api/things-to-do, /api/cars, /api/jobs-seen, /api/restaurants).
+
+Opt-in per request: ?limit=N and/or ?cursor=... page the list, ?fields=id,title,image_url picks columns.
+Without them an endpoint returns every row as before. Pages are ordered by (sort column, id) and the
+next page starts after the last row of this one (no OFFSET), so rows added meanwhile do not shift pages.
+The cursor for the next page is sent in the X-Next-Cursor response header; the body stays a JSON array.
+Endpoints that filter rows in Python after the query may return fewer than limit rows on a page:
+keep fetching while X-Next-Cursor is present.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+from typing import Any, Callable, Mapping
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+_COLUMN_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class PageParamError(ValueError):
+    """Invalid limit=, cursor= or fields= (the endpoint answers 400)."""
+
+
+def parse_fields(raw: str | None) -> list[str] | None:
+    """Column names from 'id,title,price', or None for all columns."""
+    fields = [f.strip().lower() for f in (raw or "").split(",") if f.strip()]
+    if not fields:
+        return None
+    bad = [f for f in fields if not _COLUMN_RE.match(f)]
+    if bad:
+        raise PageParamError(f"Unknown field: {bad[0]}")
+    return list(dict.fromkeys(fields))
+
+
+def encode_cursor(column: str, value: Any, row_id: Any) -> str:
+    raw = json.dumps([column, value, row_id], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, Any, Any]:
+    """(column, value, id) of a cursor from encode_cursor; raises PageParamError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        column, value, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise PageParamError("Invalid cursor") from None
+    if not isinstance(column, str) or row_id is None:
+        raise PageParamError("Invalid cursor")
+    return column, value, row_id
+
+
+def project_rows(rows: list[dict[str, Any]], fields: list[str] | None) -> list[dict[str, Any]]:
+    """Rows cut down to fields (plus id); unchanged when fields is None."""
+    if not fields:
+        return rows
+    keep = list(dict.fromkeys(["id", *fields]))
+    return [{k: row.get(k) for k in keep} for row in rows]
+
+
+def _literal(value: Any) -> str:
+    """A value inside a PostgREST logic tree: strings double-quoted (timestamps contain ':' and '.')."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class ListPage:
+    """One page of a list ordered by (column, id); NULLs in column sort last in both directions."""
+
+    def __init__(
+        self,
+        column: str,
+        desc: bool = False,
+        limit: int | None = None,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> None:
+        self.column = column
+        self.desc = desc
+        self.fields = fields
+        self.after = None
+        if cursor:
+            cursor_column, value, row_id = decode_cursor(cursor)
+            if cursor_column != column:
+                raise PageParamError("Cursor is for a different sort order")
+            self.after = (value, row_id)
+        self.paged = limit is not None or self.after is not None
+        self.limit = limit if limit is not None else DEFAULT_LIMIT
+        self.next_cursor: str | None = None
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], column: str, desc: bool = False) -> "ListPage":
+        """ListPage from request args (limit=, cursor=, fields=); raises PageParamError."""
+        raw_limit = (args.get("limit") or "").strip()
+        limit = None
+        if raw_limit:
+            try:
+                limit = int(raw_limit)
+            except ValueError:
+                raise PageParamError("limit must be a whole number") from None
+            if limit < 1:
+                raise PageParamError("limit must be at least 1")
+            limit = min(limit, MAX_LIMIT)
+        return cls(
+            column,
+            desc=desc,
+            limit=limit,
+            cursor=(args.get("cursor") or "").strip() or None,
+            fields=parse_fields(args.get("fields")),
+        )
+
+    def select(self, needs: tuple[str, ...] = ()) -> str:
+        """select() columns: fields plus id, the sort column and any columns the endpoint filters on."""
+        if not self.fields:
+            return "*"
+        return ",".join(dict.fromkeys([*self.fields, "id", self.column, *needs]))
+
+    @property
+    def order(self) -> str:
+        """PostgREST order value, e.g. 'created_at.desc.nullslast,id.desc'.
+
+        One order param for both columns: postgrest-py appends a separate order= per order() call.
+        """
+        direction = ".desc" if self.desc else ""
+        return f"{self.column}{direction}.nullslast,id{direction}"
+
+    def apply(self, query: Any) -> Any:
+        """Order, start after the cursor and fetch limit + 1 rows (the extra one says whether there is more)."""
+        query = query.order(self.order)
+        if self.after is not None:
+            query.params = query.params.add("or", f"({','.join(self._after_conditions())})")
+        return query.limit(self.limit + 1)
+
+    def _after_conditions(self) -> list[str]:
+        value, row_id = self.after
+        op = "lt" if self.desc else "gt"
+        col = self.column
+        if value is None:
+            return [f"and({col}.is.null,id.{op}.{_literal(row_id)})"]
+        v = _literal(value)
+        return [f"{col}.{op}.{v}", f"and({col}.eq.{v},id.{op}.{_literal(row_id)})", f"{col}.is.null"]
+
+    def page(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """The rows of a query built with apply(), trimmed to limit; sets next_cursor."""
+        if not self.paged:
+            return rows
+        more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        self.next_cursor = None
+        if more and rows:
+            last = rows[-1]
+            self.next_cursor = encode_cursor(self.column, last.get(self.column), last.get("id"))
+        return rows
+
+    def page_rows(
+        self,
+        rows: list[dict[str, Any]],
+        value: Callable[[dict[str, Any]], Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Same ordering and paging over rows already held in full (product cache, legacy fallbacks).
+
+        value(row) is the sort value when it is not simply row[column] (e.g. a price parsed from text).
+        """
+        value = value or (lambda row: row.get(self.column))
+
+        def key(row: dict[str, Any]) -> tuple[Any, Any]:
+            return value(row), row.get("id")
+
+        present = sorted((r for r in rows if value(r) is not None), key=key, reverse=self.desc)
+        missing = sorted((r for r in rows if value(r) is None), key=key, reverse=self.desc)
+        ordered = present + missing
+        if not self.paged:
+            return ordered
+        if self.after is not None:
+            ordered = [r for r in ordered if self._is_after(value(r), r.get("id"))]
+        more = len(ordered) > self.limit
+        ordered = ordered[: self.limit]
+        self.next_cursor = None
+        if more and ordered:
+            last = ordered[-1]
+            self.next_cursor = encode_cursor(self.column, value(last), last.get("id"))
+        return ordered
+
+    def _is_after(self, value: Any, row_id: Any) -> bool:
+        after_value, after_id = self.after
+        if after_value is None:
+            return value is None and (row_id < after_id if self.desc else row_id > after_id)
+        if value is None:
+            return True
+        if value == after_value:
+            return row_id < after_id if self.desc else row_id > after_id
+        return value < after_value if self.desc else value > after_value
+
+    def project(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Rows cut down to fields (plus id) when fields= was given."""
+        return project_rows(rows, self.fields)
@@ -0,0 +1,220 @@
+"""
+Bounded in-process TTL/LRU cache for product link previews.
+Used by Flask /api/products/preview so the same retailer link is not re-downloaded
+and re-parsed when it is previewed again within a few minutes (another tab, save after preview).
+Concurrent misses for the same link are coalesced: one caller scrapes, the others wait for its result.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query params that only track where a click came from, on any site; they never change the product shown.
+_TRACKING_PARAMS = {
+    "gclid",
+    "gclsrc",
+    "dclid",
+    "fbclid",
+    "msclkid",
+    "igshid",
+    "_ga",
+    "_gl",
+}
+_TRACKING_PREFIXES = ("utm_", "mc_")
+
+# Retailer-specific referral / affiliate params. Elsewhere names like tag=, ref= or th= can select the
+# product or variant, so these are only dropped on the retailer's own hosts.
+_AMAZON_PARAMS = {
+    "ref",
+    "ref_",
+    "tag",
+    "linkcode",
+    "linkid",
+    "ascsubtag",
+    "psc",
+    "th",
+    "smid",
+    "spla",
+    "_encoding",
+}
+_AMAZON_PREFIXES = ("pd_rd_", "pf_rd_")
+_TEMU_PARAMS = {
+    "share_id",
+    "refer_page_name",
+    "refer_page_id",
+    "refer_page_sn",
+}
+_TEMU_PREFIXES = ("_x_", "_bg_")
+
+_AMAZON_ASIN_RE = re.compile(r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin)/([A-Z0-9]{10})(?:[/?]|$)", re.IGNORECASE)
+
+
+def _is_amazon_host(host: str) -> bool:
+    return "amazon." in host or host.startswith("amzn.")
+
+
+def _is_tracking_param(name: str, host: str = "") -> bool:
+    key = name.lower()
+    if key in _TRACKING_PARAMS or key.startswith(_TRACKING_PREFIXES):
+        return True
+    if _is_amazon_host(host):
+        return key in _AMAZON_PARAMS or key.startswith(_AMAZON_PREFIXES)
+    if "temu.com" in host:
+        return key in _TEMU_PARAMS or key.startswith(_TEMU_PREFIXES)
+    return False
+
+
+def canonical_product_url(url: str) -> str:
+    """Cache key for a product link: lower-cased host, no fragment or tracking params, Amazon reduced to /dp/ASIN.
+
+    Only the generic trackers are dropped everywhere; Amazon / Temu referral params only on their own hosts.
+    """
+    url = (url or "").strip()
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url
+    scheme = (parsed.scheme or "https").lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path or "/"
+
+    if _is_amazon_host(host):
+        m = _AMAZON_ASIN_RE.search(path)
+        if m:
+            return urlunparse((scheme, host, f"/dp/{m.group(1).upper()}", "", "", ""))
+
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not _is_tracking_param(k, host)]
+    query.sort()
+    return urlunparse((scheme, host, path, parsed.params, urlencode(query), ""))
+
+
+class PreviewCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters.
+
+    Entries are stored as (expires_at, value); values are copied on the way in and out
+    so callers can mutate the dict they get back. get_or_compute() is single-flight per key.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 900.0, negative_ttl: float = 60.0) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl)
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> Future of the compute() currently running for it
+        self._inflight: dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        return dict(value) if isinstance(value, dict) else value
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """(found, value) for key; expired entries count as a miss and are dropped."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._copy(entry[1])
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else float(ttl)
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, self._copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        is_negative: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Cached value for key, or compute() stored with the normal or negative TTL."""
+        return self.resolve(key, compute, is_negative)[1]
+
+    def resolve(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        is_negative: Callable[[Any], bool] | None = None,
+    ) -> tuple[str, Any]:
+        """("hit" | "miss" | "coalesced", value) for key.
+
+        On a miss only the first caller runs compute(); callers arriving while it runs wait for
+        and share its result (or its exception) instead of computing the same key again.
+        """
+        found, value = self.get(key)
+        if found:
+            return "hit", value
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            return "coalesced", self._copy(pending.result())
+
+        try:
+            value = compute()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            negative = is_negative(value) if is_negative else value is None
+            self.set(key, value, ttl=self.negative_ttl if negative else self.ttl)
+            pending.set_result(self._copy(value))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return "miss", self._copy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "negative_ttl_seconds": self.negative_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
@@ -0,0 +1,131 @@
+"""
+Per-stage timers for the product preview pipeline (connect, download, parse, re-fetches, extraction).
+A PreviewTimer is active for the current request/thread via a context variable, so deep helpers can
+record stages without threading it through every call. Finished previews are aggregated per retailer
+and stage for p50/p95/p99 reporting, and the route turns one timer into a Server-Timing header.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+_current: ContextVar["PreviewTimer | None"] = ContextVar("preview_timer", default=None)
+
+
+class PreviewTimer:
+    """Stage durations (seconds) of one preview. Stages may nest: 'fetch' contains connect/download/parse."""
+
+    def __init__(self) -> None:
+        self.retailer = "generic"
+        self.cache: str | None = None
+        self.stages: dict[str, float] = {}
+        self._muted = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        if not self._muted:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    @contextmanager
+    def muted(self) -> Iterator[None]:
+        """Suppress nested stages (a re-fetch is reported as one stage, not as extra connect/parse time)."""
+        self._muted += 1
+        try:
+            yield
+        finally:
+            self._muted -= 1
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'connect;dur=41.2, parse;dur=18.0, retailer;desc="amazon"'."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f'retailer;desc="{self.retailer}"')
+        if self.cache:
+            parts.append(f'cache;desc="{self.cache}"')
+        return ", ".join(parts)
+
+
+def current() -> PreviewTimer | None:
+    return _current.get()
+
+
+@contextmanager
+def activate(timer: PreviewTimer | None = None) -> Iterator[PreviewTimer]:
+    """Make timer (or the already active one, or a new one) current for the enclosed code."""
+    timer = timer or _current.get() or PreviewTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block into the active timer; a no-op when none is active."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+@contextmanager
+def muted() -> Iterator[None]:
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.muted():
+        yield
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class TimingStats:
+    """Most recent max_samples durations per (retailer, stage), summarised as percentiles on demand."""
+
+    def __init__(self, max_samples: int = 500) -> None:
+        self.max_samples = max_samples
+        self._samples: dict[tuple[str, str], deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timer: PreviewTimer) -> None:
+        with self._lock:
+            for name, seconds in timer.stages.items():
+                key = (timer.retailer, name)
+                if key not in self._samples:
+                    self._samples[key] = deque(maxlen=self.max_samples)
+                self._samples[key].append(seconds)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """{retailer: {stage: {count, p50_ms, p95_ms, p99_ms, max_ms}}}"""
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+        out: dict[str, dict[str, dict[str, Any]]] = {}
+        for (retailer, name), values in sorted(samples.items()):
+            out.setdefault(retailer, {})[name] = {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                "p95_ms": round(_percentile(values, 95) * 1000, 1),
+                "p99_ms": round(_percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            }
+        return out
@@ -0,0 +1,295 @@
+"""
+Price refresh for ha_products: re-scrape the price of unbought products so the Presents and Baby pages
+do not show the price from the day an item was added. Products are walked in priority order (never
+checked, then presents / baby items, then the longest unchecked), at most one visit per retailer host
+every host_interval seconds. The ETag / Last-Modified a retailer sent last time go with the preview's own
+page fetch (If-None-Match / If-Modified-Since), so each check is one request and an unchanged page (304)
+is not downloaded or re-parsed. Changed prices are appended to ha_product_price_history. Used by Flask POST /api/products/refresh-prices and scripts/refresh_prices.py.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+from fetch_all import fetch_all_rows
+
+HISTORY_TABLE = "ha_product_price_history"
+PRODUCT_COLUMNS = (
+    "id, link, price, bought, x_remove, is_present, is_baby, created_at, "
+    "price_checked_at, price_etag, price_last_modified"
+)
+
+RESULT_CHANGED = "changed"
+RESULT_SAME = "same"
+RESULT_NOT_MODIFIED = "not_modified"
+RESULT_FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+# '1,299.99' (thousands commas), '9,99' (decimal comma) or '12.50'.
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?(?!\d)|\d+,\d{1,2}(?!\d)|\d+(?:\.\d+)?"
+_THOUSANDS_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+# An amount, optionally followed by a range: '£12 - £30', '12 to 30', '£12–30'.
+_PRICE_RE = re.compile(rf"({_NUMBER})(?:\s*(?:-|–|—|to)\s*(?:[^\d\s]{{1,3}}\s*)?({_NUMBER}))?", re.IGNORECASE)
+# Checked in order, so 'HK$' wins over '$'.
+_CURRENCY_MARKERS = (
+    ("HK$", "HKD"),
+    ("HKD", "HKD"),
+    ("US$", "USD"),
+    ("USD", "USD"),
+    ("£", "GBP"),
+    ("GBP", "GBP"),
+    ("€", "EUR"),
+    ("EUR", "EUR"),
+    ("$", "USD"),
+)
+# Scraped JSON-LD prices ('25.00') and hand-typed ones usually have no symbol; this is a UK household list.
+DEFAULT_CURRENCY = "GBP"
+
+
+def _number(text: str) -> float:
+    if _THOUSANDS_RE.fullmatch(text):
+        return float(text.replace(",", ""))
+    return float(text.replace(",", "."))
+
+
+def parse_price(price: str | None) -> tuple[float | None, float | None, str | None]:
+    """(amount, price_max, currency) of a free-text price.
+
+    '£199' -> (199.0, None, 'GBP'); '£12 – £30' -> (12.0, 30.0, 'GBP'); 'HK$1,200' -> (1200.0, None, 'HKD').
+    amount is the lower end of a range; all three are None when the text has no number.
+    """
+    text = (price or "").strip()
+    m = _PRICE_RE.search(text)
+    if not m:
+        return None, None, None
+    amount = _number(m.group(1))
+    price_max = _number(m.group(2)) if m.group(2) else None
+    if price_max is not None and price_max <= amount:
+        price_max = None
+    upper = text.upper()
+    currency = next((code for marker, code in _CURRENCY_MARKERS if marker in upper), DEFAULT_CURRENCY)
+    return amount, price_max, currency
+
+
+def price_columns(price: str | None) -> dict[str, Any]:
+    """ha_products price_amount / price_max / currency for a price string."""
+    amount, price_max, currency = parse_price(price)
+    return {"price_amount": amount, "price_max": price_max, "currency": currency}
+
+
+def price_amount(price: str | None) -> float | None:
+    """Numeric amount of a scraped price string ('£1,299.00' -> 1299.0), or None."""
+    return parse_price(price)[0]
+
+
+def same_price(a: str | None, b: str | None) -> bool:
+    """True when two price strings name the same amount, range and currency ('£25.00' == '25', '£12 – £30' != '£12').
+
+    Compared as text when either has no number.
+    """
+    parsed_a, parsed_b = parse_price(a), parse_price(b)
+    if parsed_a[0] is not None and parsed_b[0] is not None:
+        return parsed_a == parsed_b
+    return (a or "").strip().lower() == (b or "").strip().lower()
+
+
+def _host(url: str) -> str:
+    host = (urlparse(url).netloc or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _parse_time(value: Any) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def refresh_order(rows: list[dict[str, Any]], min_age: timedelta, now: datetime | None = None) -> list[dict[str, Any]]:
+    """Products due a price check, most urgent first.
+
+    Skips bought / removed items, rows without an http(s) link and rows checked within min_age.
+    """
+    now = now or datetime.now(timezone.utc)
+    due = []
+    for row in rows:
+        link = (row.get("link") or "").strip()
+        if row.get("bought") or row.get("x_remove") or not link.startswith(("http://", "https://")):
+            continue
+        checked = _parse_time(row.get("price_checked_at"))
+        if checked is not None and now - checked < min_age:
+            continue
+        due.append(row)
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+
+    def priority(row: dict[str, Any]) -> tuple[bool, bool, datetime]:
+        checked = _parse_time(row.get("price_checked_at"))
+        gift_page = bool(row.get("is_present") or row.get("is_baby"))
+        return checked is not None, not gift_page, checked or _parse_time(row.get("created_at")) or oldest
+
+    return sorted(due, key=priority)
+
+
+class PageNotModified(Exception):
+    """The product page answered 304 to a conditional fetch: there is nothing new to extract."""
+
+
+class PageValidators:
+    """ETag / Last-Modified of a product page, sent with the preview's main page fetch.
+
+    The fetch calls record() with its response: a 304 sets not_modified, any other successful response
+    replaces etag / last_modified with what it sent (None when it sent none).
+    """
+
+    def __init__(self, etag: str | None = None, last_modified: str | None = None) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = False
+
+    def request_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def record(self, status_code: int, headers: Any) -> None:
+        if status_code == 304:
+            self.not_modified = True
+            self.etag = headers.get("ETag") or self.etag
+            self.last_modified = headers.get("Last-Modified") or self.last_modified
+        elif status_code < 400:
+            self.etag = headers.get("ETag")
+            self.last_modified = headers.get("Last-Modified")
+
+
+class HostRateLimiter:
+    """At most one visit per host every min_interval seconds."""
+
+    def __init__(self, min_interval: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.min_interval = float(min_interval)
+        self._clock = clock
+        self._last: dict[str, float] = {}
+
+    def wait_time(self, host: str) -> float:
+        last = self._last.get(host)
+        if last is None:
+            return 0.0
+        return max(0.0, last + self.min_interval - self._clock())
+
+    def mark(self, host: str) -> None:
+        self._last[host] = self._clock()
+
+
+class PriceRefresher:
+    """Re-scrapes product prices through preview (the product preview pipeline: (url, PageValidators) -> dict or None).
+
+    preview sends the validators with its main page fetch and records the response in them; on a 304 it
+    sets not_modified and may return without extracting anything.
+    """
+
+    def __init__(
+        self,
+        supabase: Any,
+        preview: Callable[[str, PageValidators], dict[str, Any] | None],
+        host_interval: float = 20.0,
+        min_age: timedelta = timedelta(hours=24),
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.supabase = supabase
+        self.preview = preview
+        self.limiter = HostRateLimiter(host_interval)
+        self.min_age = min_age
+        self._sleep = sleep
+
+    def candidates(self, limit: int) -> list[dict[str, Any]]:
+        rows = fetch_all_rows(self.supabase, "ha_products", PRODUCT_COLUMNS, where=lambda q: q.eq("bought", False))
+        return refresh_order(rows, self.min_age)[:limit]
+
+    def refresh_one(self, row: dict[str, Any], dry_run: bool = False) -> dict[str, Any]:
+        link = row["link"].strip()
+        old_price = row.get("price")
+        validators = PageValidators(row.get("price_etag"), row.get("price_last_modified"))
+        update: dict[str, Any] = {"price_checked_at": datetime.now(timezone.utc).isoformat()}
+        result: dict[str, Any] = {"id": row["id"], "link": link, "previous_price": old_price}
+
+        data = self.preview(link, validators) or {}
+        if validators.not_modified:
+            if not dry_run:
+                self._update_product(row["id"], update)
+            return {**result, "status": RESULT_NOT_MODIFIED, "price": old_price}
+        price = (data.get("price") or "").strip()
+        if not price or data.get("blocked") or data.get("partial"):
+            # Keep the stored validators: a later 304 must not hide a price we never managed to read.
+            if not dry_run:
+                self._update_product(row["id"], update)
+            return {**result, "status": RESULT_FAILED, "price": old_price}
+
+        update["price_etag"] = validators.etag
+        update["price_last_modified"] = validators.last_modified
+        if same_price(price, old_price):
+            status = RESULT_SAME
+            price = old_price
+        else:
+            status = RESULT_CHANGED
+            update["price"] = price
+            update.update(price_columns(price))
+        if not dry_run:
+            if status == RESULT_CHANGED:
+                self.supabase.table(HISTORY_TABLE).insert({
+                    "product_id": row["id"],
+                    "price": price,
+                    "previous_price": old_price,
+                    "source": "refresh",
+                }).execute()
+            self._update_product(row["id"], update)
+        return {**result, "status": status, "price": price}
+
+    def _update_product(self, product_id: Any, update: dict[str, Any]) -> None:
+        self.supabase.table("ha_products").update(update).eq("id", product_id).execute()
+
+    def run(self, limit: int = 20, dry_run: bool = False) -> dict[str, Any]:
+        """Check up to limit due products, interleaving hosts so one slow retailer does not stall the rest."""
+        queue = self.candidates(limit)
+        results = []
+        while queue:
+            row = next((r for r in queue if self.limiter.wait_time(_host(r["link"])) <= 0), None)
+            if row is None:
+                self._sleep(min(self.limiter.wait_time(_host(r["link"])) for r in queue))
+                continue
+            queue.remove(row)
+            self.limiter.mark(_host(row["link"]))
+            try:
+                results.append(self.refresh_one(row, dry_run=dry_run))
+            except Exception as e:
+                logger.warning("Price refresh failed for product %s: %s", row.get("id"), e)
+                results.append({"id": row.get("id"), "link": row.get("link"), "status": RESULT_FAILED, "error": str(e)})
+        summary: dict[str, Any] = {"checked": len(results), "dry_run": dry_run}
+        for status in (RESULT_CHANGED, RESULT_SAME, RESULT_NOT_MODIFIED, RESULT_FAILED):
+            summary[status] = sum(1 for r in results if r["status"] == status)
+        summary["results"] = results
+        return summary
+
+
+def price_trend(current_price: str | None, history: list[dict[str, Any]]) -> dict[str, Any]:
+    """First-known vs current price of a product from its history rows (oldest first)."""
+    first = history[0].get("previous_price") if history else current_price
+    first_amount, current_amount = price_amount(first), price_amount(current_price)
+    trend: dict[str, Any] = {"first_price": first, "current_price": current_price, "direction": None}
+    if first_amount is None or current_amount is None:
+        return trend
+    change = round(current_amount - first_amount, 2)
+    trend["change"] = change
+    trend["change_percent"] = round(change / first_amount * 100, 1) if first_amount else None
+    trend["direction"] = "up" if change > 0 else "down" if change < 0 else "flat"
+    return trend
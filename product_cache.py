@@ -0,0 +1,177 @@
+"""
+In-process snapshot of the ha_products table for the product list pages (/api/products, /api/presents,
+/api/baby-products, /api/muswell-hill-products, /api/hk-products), which then filter in memory instead of
+querying Supabase on every page load. The table is small (hundreds to a few thousand rows) and changes
+mostly through this app: product writes here patch the snapshot in place. Writes from the other gunicorn
+worker or from scripts are caught by version(), a cheap query of the table's current version (e.g. row
+count and latest updated_at) checked before each use: when it no longer matches snapshot_version() of the
+snapshot, the snapshot is reloaded. ttl seconds is a backstop on top.
+A tag_index.TagIndex over the snapshot is kept in step with it for tag queries.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+from tag_index import TagIndex, TagQuery
+
+logger = logging.getLogger(__name__)
+
+
+class ProductCache:
+    """Thread-safe {id: row} snapshot loaded by loader(); ttl <= 0 disables it (enabled is False).
+
+    rows() returns shared row dicts: treat them as read-only. Concurrent reloads are single-flight,
+    and patches made while a reload is running are replayed onto the fresh snapshot.
+    With version / snapshot_version given, a snapshot is only served while version() equals
+    snapshot_version(snapshot rows); if version() fails the snapshot is reloaded instead.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], list[dict[str, Any]]],
+        ttl: float = 60.0,
+        version: Callable[[], Any] | None = None,
+        snapshot_version: Callable[[Iterable[dict[str, Any]]], Any] | None = None,
+    ) -> None:
+        self.loader = loader
+        self.ttl = float(ttl)
+        self.version = version
+        self.snapshot_version = snapshot_version
+        self._rows: dict[Any, dict[str, Any]] | None = None
+        self._version: Any = None
+        self._tag_index = TagIndex()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Patches made while a reload is running: ("upsert", row) / ("remove", id)
+        self._pending: list[tuple[str, Any]] | None = None
+        self.hits = 0
+        self.loads = 0
+        self.patches = 0
+        self.stale = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _fresh(self) -> bool:
+        return self._rows is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Every cached row, reloading the snapshot first when it is missing or older than ttl."""
+        return list(self._snapshot().values())
+
+    def tag_search(self, query: TagQuery) -> tuple[list[dict[str, Any]], dict[str, int]]:
+        """(rows matching query, {tag: count} over those rows), answered from the tag index."""
+        self._snapshot()
+        with self._lock:
+            ids = self._tag_index.ids(query)
+            return [self._rows[i] for i in ids if i in self._rows], self._tag_index.counts(ids)
+
+    def _current(self) -> bool:
+        """False when the table has changed since the snapshot (another worker or a script wrote to it)."""
+        if self.version is None or self.snapshot_version is None:
+            return True
+        try:
+            version = self.version()
+        except Exception as e:
+            logger.warning("Product cache version check failed, reloading: %s", e)
+            return False
+        with self._lock:
+            if version == self._version:
+                return True
+            self.stale += 1
+            return False
+
+    def _snapshot(self) -> dict[Any, dict[str, Any]]:
+        with self._lock:
+            fresh = self._fresh()
+        if fresh and self._current():
+            with self._lock:
+                if self._rows is not None:
+                    self.hits += 1
+                    return self._rows
+        with self._lock:
+            self._loaded_at = 0.0
+        with self._load_lock:
+            with self._lock:
+                # Another thread reloaded while this one waited for the load lock.
+                if self._fresh():
+                    self.hits += 1
+                    return self._rows
+                self._pending = []
+            try:
+                loaded = self.loader()
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                snapshot = {row.get("id"): row for row in loaded}
+                for op, value in self._pending or []:
+                    self._apply(snapshot, op, value)
+                self._pending = None
+                self._rows = snapshot
+                self._version = self._snapshot_version(snapshot)
+                self._tag_index = TagIndex(snapshot.values())
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+                return snapshot
+
+    def _snapshot_version(self, snapshot: dict[Any, dict[str, Any]]) -> Any:
+        return self.snapshot_version(snapshot.values()) if self.snapshot_version is not None else None
+
+    @staticmethod
+    def _apply(snapshot: dict[Any, dict[str, Any]], op: str, value: Any) -> None:
+        if op == "remove":
+            snapshot.pop(value, None)
+        else:
+            snapshot[value.get("id")] = {**snapshot.get(value.get("id"), {}), **value}
+
+    def _patch(self, op: str, value: Any) -> None:
+        with self._lock:
+            self.patches += 1
+            if self._pending is not None:
+                self._pending.append((op, value))
+            if self._rows is not None:
+                # Copy-on-write: lists already handed out by rows() keep the rows they had.
+                snapshot = dict(self._rows)
+                self._apply(snapshot, op, value)
+                self._rows = snapshot
+                # The patched rows carry the database's new values, so the snapshot stays current.
+                self._version = self._snapshot_version(snapshot)
+                if op == "remove":
+                    self._tag_index.remove(value)
+                else:
+                    self._tag_index.set_row(snapshot[value.get("id")])
+
+    def upsert(self, row: dict[str, Any]) -> None:
+        """Insert or merge a row as returned by an insert / update."""
+        if row.get("id") is not None:
+            self._patch("upsert", dict(row))
+
+    def remove(self, row_id: Any) -> None:
+        self._patch("remove", row_id)
+
+    def invalidate(self) -> None:
+        """Reload on next use (after writes this process cannot patch, e.g. a bulk price refresh)."""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._rows) if self._rows is not None else None,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._rows is not None else None,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "loads": self.loads,
+                "patches": self.patches,
+                "stale_reloads": self.stale,
+                "tags": len(self._tag_index),
+            }
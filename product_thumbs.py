@@ -0,0 +1,100 @@
+"""
+WebP thumbnails of product images for the product grids (Highgate / Baby / Presents pages).
+Retailer originals are often 1-3 MB; when a product is saved its image_url is downloaded once,
+resized to small / medium WebP variants (~10-40 KB) and stored in our bucket under a key derived
+from the image URL, so re-saving a product with the same image reuses the existing thumbnails.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from io import BytesIO
+from typing import Callable
+
+from PIL import Image, ImageOps
+
+import scrape_http
+
+# Longest edge in px: small for grid tiles (2x for retina at ~120px), medium for larger cards / modals.
+THUMB_SIZES = {"small": 320, "medium": 640}
+THUMB_QUALITY = 78
+CONTENT_TYPE = "image/webp"
+MAX_SOURCE_BYTES = 12 * 1024 * 1024
+# Refuse decompression bombs well before Pillow's own (much higher) limit.
+MAX_SOURCE_PIXELS = 40_000_000
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class ThumbnailError(Exception):
+    """The source image could not be downloaded or decoded."""
+
+
+def thumb_key(product_id: int | str, image_url: str, size: str) -> str:
+    digest = hashlib.sha1(image_url.encode("utf-8")).hexdigest()[:16]
+    return f"product-thumbs/{product_id}/{digest}-{size}.webp"
+
+
+def download_image(url: str, timeout: float = 15) -> bytes:
+    """Image bytes from url (streamed, at most MAX_SOURCE_BYTES); raises ThumbnailError."""
+    headers = {"User-Agent": USER_AGENT, "Accept": "image/avif,image/webp,image/*,*/*;q=0.8"}
+    try:
+        r = scrape_http.get(url, headers=headers, timeout=timeout, stream=True)
+    except Exception as e:
+        raise ThumbnailError(f"Could not fetch image: {e}") from e
+    try:
+        if r.status_code >= 400:
+            raise ThumbnailError(f"HTTP {r.status_code} fetching image")
+        content_type = (r.headers.get("Content-Type") or "").lower()
+        if content_type and not content_type.startswith(("image/", "application/octet-stream", "binary/")):
+            raise ThumbnailError(f"Not an image ({content_type})")
+        chunks, size = [], 0
+        for chunk in r.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > MAX_SOURCE_BYTES:
+                raise ThumbnailError("Image too large")
+            chunks.append(chunk)
+    finally:
+        r.close()
+    return b"".join(chunks)
+
+
+def make_thumbnails(data: bytes) -> dict[str, bytes]:
+    """{size name: WebP bytes} for every THUMB_SIZES entry; never upscales. Raises ThumbnailError."""
+    try:
+        with Image.open(BytesIO(data)) as img:
+            if img.width * img.height > MAX_SOURCE_PIXELS:
+                raise ThumbnailError("Image has too many pixels")
+            img.draft("RGB", (max(THUMB_SIZES.values()),) * 2)
+            img = ImageOps.exif_transpose(img)
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+            out = {}
+            for name, edge in sorted(THUMB_SIZES.items(), key=lambda item: -item[1]):
+                img.thumbnail((edge, edge), Image.LANCZOS)
+                buf = BytesIO()
+                img.save(buf, "WEBP", quality=THUMB_QUALITY, method=4)
+                out[name] = buf.getvalue()
+            return out
+    except ThumbnailError:
+        raise
+    except Exception as e:
+        raise ThumbnailError(f"Could not decode image: {e}") from e
+
+
+def build_thumbnails(
+    product_id: int | str,
+    image_url: str,
+    store: Callable[[str, bytes, str], str],
+) -> dict[str, str]:
+    """Download image_url, resize, and store(key, bytes, content_type) each variant.
+
+    Returns {'thumb_small_url': ..., 'thumb_medium_url': ...} with the URLs store() returned.
+    """
+    variants = make_thumbnails(download_image(image_url))
+    return {
+        f"thumb_{name}_url": store(thumb_key(product_id, image_url, name), data, CONTENT_TYPE)
+        for name, data in variants.items()
+    }
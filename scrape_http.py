@@ -0,0 +1,91 @@
+"""
+Shared outbound HTTP client for scraping (product previews, Autotrader, Google Maps, dice/Songkick).
+Connections are pooled per host and kept alive across requests and threads, so repeat fetches
+to the same retailer skip the TCP/TLS handshake. Cookies are not: like requests.get, every call starts
+with an empty jar (cookies= per call still works, and cookies set during a redirect chain are followed).
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+# Distinct hosts whose connection pools are kept, and idle keep-alive connections kept per host.
+# Extra connections beyond POOL_MAXSIZE are still opened under load but closed after use.
+POOL_CONNECTIONS = int(os.getenv("SCRAPE_POOL_CONNECTIONS", "32"))
+POOL_MAXSIZE = int(os.getenv("SCRAPE_POOL_MAXSIZE", "8"))
+
+# urllib3 advertises only the codings it can decode: gzip/deflate always, br when brotli is installed.
+DEFAULT_HEADERS = {
+    "Accept-Encoding": ACCEPT_ENCODING.replace(",", ", "),
+    "Connection": "keep-alive",
+}
+
+_adapter_lock = threading.Lock()
+_adapters: dict[str, HTTPAdapter] = {}
+# Bumped by mount_adapter(); thread sessions built for an older generation are rebuilt.
+_generation = 0
+_local = threading.local()
+
+
+def _shared_adapter(scheme: str) -> HTTPAdapter:
+    """One pooled adapter per scheme, shared by every thread's session (urllib3 pools are thread-safe)."""
+    with _adapter_lock:
+        adapter = _adapters.get(scheme)
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            _adapters[scheme] = adapter
+        return adapter
+
+
+def mount_adapter(adapter: HTTPAdapter) -> None:
+    """Send all outbound scraping (http and https) through adapter, e.g. an offline fixture stand-in."""
+    global _generation
+    with _adapter_lock:
+        _adapters["https"] = adapter
+        _adapters["http"] = adapter
+        _generation += 1
+
+
+def get_session() -> requests.Session:
+    """This thread's Session: sockets come from the shared pools, its cookie jar never stores anything.
+
+    A thread serves many users and retailers, so a persistent jar would carry one user's retailer session
+    (or a bot-block / consent cookie) into the next fetch. Response.cookies is still filled in.
+    """
+    session = getattr(_local, "session", None)
+    if session is None or getattr(_local, "generation", None) != _generation:
+        session = requests.Session()
+        session.cookies = requests.cookies.RequestsCookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("https://", _shared_adapter("https"))
+        session.mount("http://", _shared_adapter("http"))
+        _local.session = session
+        _local.generation = _generation
+    return session
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    """requests.get over the pooled session (same keyword arguments)."""
+    kwargs.setdefault("allow_redirects", True)
+    return get_session().get(url, **kwargs)
+
+
+def abort(response: requests.Response) -> None:
+    """Make a body read blocked in another thread fail now (Response.close() would wait for that read).
+
+    Shuts the socket down; the reading thread still closes the response, and the connection is not reused.
+    """
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
@@ -0,0 +1,234 @@
+"""
+Background jobs for slow scrapes (product / car / restaurant previews, event-url import).
+Endpoints enqueue a job and return its id at once; the job runs on a small thread pool in the
+worker that accepted it, and its status/result is kept in SQLite so any gunicorn worker can answer
+GET /api/scrape-jobs/<id> (poll) or /api/scrape-jobs/<id>/events (Server-Sent Events).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+FINAL_STATUSES = (STATUS_DONE, STATUS_ERROR)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists scrape_jobs (
+    id text primary key,
+    kind text not null,
+    status text not null,
+    params text,
+    result text,
+    http_status integer,
+    error text,
+    created_at real not null,
+    updated_at real not null,
+    worker_pid integer,
+    heartbeat_at real
+)
+"""
+# Columns added after the first release: (name, type), added to existing job databases on open.
+_ADDED_COLUMNS = (("worker_pid", "integer"), ("heartbeat_at", "real"))
+
+
+class ScrapeJobStore:
+    """SQLite-backed job table; a fresh connection per call keeps it safe across threads and processes."""
+
+    def __init__(self, path: str, retention: float = 3600.0, stale_after: float = 300.0) -> None:
+        self.path = path
+        self.retention = retention
+        # A queued/running job whose worker has not sent a heartbeat this long belonged to a worker that
+        # died or restarted (ScrapeJobRunner beats well inside this while the job is queued or running).
+        self.stale_after = stale_after
+        with self._connect() as conn:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("pragma table_info(scrape_jobs)")}
+            for name, column_type in _ADDED_COLUMNS:
+                if name not in columns:
+                    conn.execute(f"alter table scrape_jobs add column {name} {column_type}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, params: dict[str, Any] | None = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "insert into scrape_jobs (id, kind, status, params, created_at, updated_at, worker_pid, heartbeat_at)"
+                " values (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, STATUS_QUEUED, json.dumps(params or {}), now, now, os.getpid(), now),
+            )
+            conn.execute(
+                "delete from scrape_jobs where coalesce(heartbeat_at, updated_at) < ?", (now - self.retention,)
+            )
+        return job_id
+
+    def delete(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("delete from scrape_jobs where id = ?", (job_id,))
+
+    def update(self, job_id: str, status: str, result: Any = None, http_status: int | None = None, error: str | None = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "update scrape_jobs set status = ?, result = ?, http_status = ?, error = ?, updated_at = ?, heartbeat_at = ?"
+                " where id = ?",
+                (status, None if result is None else json.dumps(result), http_status, error, now, now, job_id),
+            )
+
+    def heartbeat(self, job_ids: list[str]) -> None:
+        """Mark queued / running jobs as still owned by a live worker."""
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        with self._connect() as conn:
+            conn.execute(
+                f"update scrape_jobs set heartbeat_at = ? where id in ({placeholders}) and status not in (?, ?)",
+                (time.time(), *job_ids, *FINAL_STATUSES),
+            )
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._connect() as conn:
+            row = conn.execute("select * from scrape_jobs where id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "params": json.loads(row["params"] or "{}"),
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "worker_pid": row["worker_pid"],
+        }
+        beat = row["heartbeat_at"] if row["heartbeat_at"] is not None else row["updated_at"]
+        if row["status"] not in FINAL_STATUSES and time.time() - beat > self.stale_after:
+            job["status"] = STATUS_ERROR
+            job["error"] = "Job was lost (worker restarted); please retry"
+            return job
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["http_status"] is not None:
+            job["http_status"] = row["http_status"]
+        if row["error"]:
+            job["error"] = row["error"]
+        return job
+
+
+class ScrapeJobRunner:
+    """Runs job callables in the background and records their outcome in a ScrapeJobStore.
+
+    A job callable returns (body, http_status) exactly like the synchronous endpoint would;
+    raising marks the job as error. executor may be any object with submit(); if its submit()
+    refuses the work (e.g. a full bulkhead), the job row is removed and the error propagates.
+    While a job is queued or running, a background thread refreshes its heartbeat every
+    heartbeat_interval seconds (default a quarter of the store's stale_after, at most 30 s).
+    """
+
+    def __init__(
+        self,
+        store: ScrapeJobStore,
+        max_workers: int = 4,
+        executor: Any = None,
+        heartbeat_interval: float | None = None,
+    ) -> None:
+        self.store = store
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self.heartbeat_interval = heartbeat_interval or max(1.0, min(30.0, store.stale_after / 4))
+        self._active: set[str] = set()
+        self._active_lock = threading.Lock()
+        self._heartbeat_thread: threading.Thread | None = None
+
+    def submit(self, kind: str, fn: Callable[[], tuple[Any, int]], params: dict[str, Any] | None = None) -> str:
+        job_id = self.store.create(kind, params)
+        with self._active_lock:
+            self._active.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(
+                    target=self._heartbeat_loop, name="scrape-job-heartbeat", daemon=True
+                )
+                self._heartbeat_thread.start()
+        try:
+            self._executor.submit(self._run, job_id, fn)
+        except Exception:
+            self._finished(job_id)
+            self.store.delete(job_id)
+            raise
+        return job_id
+
+    def _finished(self, job_id: str) -> None:
+        with self._active_lock:
+            self._active.discard(job_id)
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._active_lock:
+                job_ids = list(self._active)
+            try:
+                self.store.heartbeat(job_ids)
+            except Exception as e:
+                logger.warning("Scrape job heartbeat failed: %s", e)
+
+    def _run(self, job_id: str, fn: Callable[[], tuple[Any, int]]) -> None:
+        try:
+            self.store.update(job_id, STATUS_RUNNING)
+            try:
+                body, http_status = fn()
+            except Exception as e:
+                logger.warning("Scrape job %s failed: %s", job_id, e)
+                self.store.update(job_id, STATUS_ERROR, http_status=500, error=str(e))
+                return
+            self.store.update(job_id, STATUS_DONE, result=body, http_status=http_status)
+        finally:
+            self._finished(job_id)
+
+
+def default_store_path() -> str:
+    return os.getenv("SCRAPE_JOBS_DB") or os.path.join(tempfile.gettempdir(), "highgate_scrape_jobs.sqlite3")
+
+
+_lock = threading.Lock()
+_runner: ScrapeJobRunner | None = None
+
+
+def get_runner(executor: Any = None) -> ScrapeJobRunner:
+    """Process-wide runner, created on first use (after gunicorn forks, so each worker gets its own pool).
+
+    executor is only used when the runner is created; by default it gets its own thread pool.
+    """
+    global _runner
+    with _lock:
+        if _runner is None:
+            store = ScrapeJobStore(
+                default_store_path(),
+                retention=float(os.getenv("SCRAPE_JOBS_RETENTION", "3600")),
+                stale_after=float(os.getenv("SCRAPE_JOBS_STALE_AFTER", "300")),
+            )
+            _runner = ScrapeJobRunner(store, max_workers=int(os.getenv("SCRAPE_JOB_WORKERS", "4")), executor=executor)
+        return _runner
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+One-off backfill of ha_products price_amount / price_max / currency from the free-text price
+(after tables/ha_products_add_price_amount.sql). New and edited products get them at write time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from fetch_all import fetch_all_rows  # noqa: E402
+from price_refresh import price_columns  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Parse ha_products.price into price_amount, price_max and currency.")
+    ap.add_argument("--all", action="store_true", help="Re-parse every row, not only rows without price_amount")
+    ap.add_argument("--dry-run", action="store_true", help="Print the parsed values without writing them")
+    args = ap.parse_args()
+
+    import app as app_module
+
+    supabase = app_module.supabase
+    if supabase is None:
+        print("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)", file=sys.stderr)
+        return 1
+    try:
+        rows = fetch_all_rows(supabase, "ha_products", "id, price, price_amount, price_max, currency")
+    except Exception as e:
+        print(f"{e}\nRun tables/ha_products_add_price_amount.sql first.", file=sys.stderr)
+        return 1
+
+    updated = unparsed = 0
+    for row in rows:
+        if not (row.get("price") or "").strip() or (row.get("price_amount") is not None and not args.all):
+            continue
+        columns = price_columns(row["price"])
+        if columns["price_amount"] is None:
+            unparsed += 1
+            print(f"{row['id']}: could not parse {row['price']!r}", file=sys.stderr)
+            continue
+        if args.dry_run:
+            print(json.dumps({"id": row["id"], "price": row["price"], **columns}, ensure_ascii=False))
+        else:
+            supabase.table("ha_products").update(columns).eq("id", row["id"]).execute()
+        updated += 1
+
+    print(f"{'Would update' if args.dry_run else 'Updated'} {updated} of {len(rows)} products; {unparsed} unparsed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Generate WebP thumbnails for existing ha_products rows (after tables/ha_products_add_thumbnails.sql).
+Products saved through the app get them automatically; this covers older rows and failed attempts.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Create small/medium WebP thumbnails for product images.")
+    ap.add_argument("--limit", type=int, default=0, help="Stop after this many products (default: all)")
+    ap.add_argument("--dry-run", action="store_true", help="List the products that need thumbnails")
+    args = ap.parse_args()
+
+    import app as app_module
+
+    supabase = app_module.supabase
+    if supabase is None:
+        print("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)", file=sys.stderr)
+        return 1
+    try:
+        rows = app_module.fetch_all_rows(supabase, "ha_products", "id, image_url, thumb_source_url")
+    except Exception as e:
+        print(f"{e}\nRun tables/ha_products_add_thumbnails.sql first.", file=sys.stderr)
+        return 1
+
+    todo = [
+        row for row in rows
+        if (row.get("image_url") or "").strip().startswith(("http://", "https://"))
+        and row.get("thumb_source_url") != row["image_url"].strip()
+    ]
+    if args.limit:
+        todo = todo[: args.limit]
+    done = failed = 0
+    for row in todo:
+        image_url = row["image_url"].strip()
+        if args.dry_run:
+            print(f"{row['id']}: {image_url}")
+            continue
+        try:
+            app_module._refresh_product_thumbs(row["id"], image_url)
+            done += 1
+        except Exception as e:
+            failed += 1
+            print(f"{row['id']}: {e}", file=sys.stderr)
+    print(f"{len(todo)} products need thumbnails; {done} done, {failed} failed", file=sys.stderr)
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
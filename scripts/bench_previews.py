@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the product preview path (app._fetch_product_preview).
+
+Serves the saved retailer pages in scripts/fixtures/previews/ from a local HTTP stand-in, routes
+all outbound scraping to it, and reports per retailer: whether the extracted fields match the
+manifest, end-to-end / parse / extract wall time and peak Python allocations.
+
+The manifest's "expected" values are the correct ones. A field the code is known to get wrong is
+listed in the entry's "known_bad" ({field: reason}); its mismatch is reported as xfail and does not
+fail the run, and a known_bad field that now matches is reported so the marker can be removed.
+--update shows a diff of the proposed expected values and asks before writing; known_bad fields
+are never overwritten.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from requests.adapters import HTTPAdapter  # noqa: E402
+
+import scrape_http  # noqa: E402
+
+FIXTURES_DIR = _ROOT / "scripts" / "fixtures" / "previews"
+MANIFEST_PATH = FIXTURES_DIR / "manifest.json"
+COMPARED_FIELDS = ("website_name", "title", "image_url", "price", "category")
+PARSER_BACKENDS = ("html.parser", "lxml")
+_HOME_PAGE = b"<!DOCTYPE html><html><head><title>Home</title></head><body>Home</body></html>"
+
+
+def load_manifest() -> dict[str, dict[str, Any]]:
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """GET /<host><path>: the fixture saved for that host, or a tiny home page for '/' (warm-ups)."""
+
+    def do_GET(self) -> None:  # noqa: N802
+        host, _, path = self.path.lstrip("/").partition("/")
+        fixture = self.server.pages_by_host.get(host.lower())  # type: ignore[attr-defined]
+        if fixture is None:
+            self.send_error(404, "No fixture for host")
+            return
+        body = fixture if path.split("?")[0].strip("/") else _HOME_PAGE
+        self.server.request_count += 1  # type: ignore[attr-defined]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, manifest: dict[str, dict[str, Any]]) -> None:
+        super().__init__(("127.0.0.1", 0), _FixtureHandler)
+        self.request_count = 0
+        self.pages_by_host = {
+            urlparse(entry["url"]).netloc.lower(): (FIXTURES_DIR / entry["file"]).read_bytes()
+            for entry in manifest.values()
+        }
+
+
+class StandInAdapter(HTTPAdapter):
+    """Rewrites https://host/path to http://127.0.0.1:<port>/host/path so scrapes hit the fixture server."""
+
+    def __init__(self, port: int) -> None:
+        super().__init__(pool_connections=4, pool_maxsize=16)
+        self.port = port
+
+    def send(self, request, **kwargs):  # type: ignore[override]
+        parsed = urlparse(request.url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        request.url = f"http://127.0.0.1:{self.port}/{parsed.netloc}{path}"
+        return super().send(request, **kwargs)
+
+
+def _time_page_builds(app_module: Any) -> dict[str, float]:
+    """Wrap the page fetchers so each preview can report time spent fetching + parsing pages."""
+    spent = {"seconds": 0.0}
+    for name in ("_fetch_product_page", "_tkmaxx_fetch_product_soup"):
+        original = getattr(app_module, name)
+
+        def timed(*args: Any, _original: Any = original, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                spent["seconds"] += time.perf_counter() - t0
+
+        setattr(app_module, name, timed)
+    return spent
+
+
+def available_parsers() -> list[str]:
+    from bs4.builder import builder_registry
+
+    return [name for name in PARSER_BACKENDS if builder_registry.lookup(name)]
+
+
+def _parse_seconds(app_module: Any, html: str, parser: str) -> float:
+    t0 = time.perf_counter()
+    app_module.BeautifulSoup(html, parser)
+    return time.perf_counter() - t0
+
+
+def bench(
+    names: list[str], repeat: int, update: bool, parser: str | None = None
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]:
+    import app as app_module
+
+    if parser:
+        app_module.PREVIEW_HTML_PARSER = parser
+    parsers = available_parsers()
+    manifest = load_manifest()
+    server = FixtureServer(manifest)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scrape_http.mount_adapter(StandInAdapter(server.server_address[1]))
+    page_time = _time_page_builds(app_module)
+    rows = []
+    try:
+        for name in names:
+            entry = manifest[name]
+            url = entry["url"]
+            html = (FIXTURES_DIR / entry["file"]).read_text(encoding="utf-8")
+
+            requests_before = server.request_count
+            tracemalloc.start()
+            result = app_module._fetch_product_preview(url) or {}
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            fetches = server.request_count - requests_before
+
+            totals, page_parts = [], []
+            for _ in range(repeat):
+                page_time["seconds"] = 0.0
+                t0 = time.perf_counter()
+                app_module._fetch_product_preview(url)
+                totals.append(time.perf_counter() - t0)
+                page_parts.append(page_time["seconds"])
+            parse = {
+                backend: statistics.median(_parse_seconds(app_module, html, backend) for _ in range(repeat))
+                for backend in parsers
+            }
+            total = statistics.median(totals)
+            extract = statistics.median(t - p for t, p in zip(totals, page_parts))
+
+            expected = entry.get("expected") or {}
+            known_bad = entry.get("known_bad") or {}
+            mismatches, xfail = {}, {}
+            for field in COMPARED_FIELDS:
+                if expected.get(field) == result.get(field):
+                    continue
+                diff = {"expected": expected.get(field), "got": result.get(field)}
+                if field in known_bad:
+                    xfail[field] = {**diff, "reason": known_bad[field]}
+                else:
+                    mismatches[field] = diff
+            if update:
+                entry["expected"] = {
+                    f: expected.get(f) if f in known_bad else result.get(f)
+                    for f in COMPARED_FIELDS
+                    if (expected.get(f) if f in known_bad else result.get(f)) is not None
+                }
+            rows.append({
+                "retailer": name,
+                "parser": app_module.PREVIEW_HTML_PARSER,
+                "ok": not mismatches,
+                "mismatches": mismatches,
+                "xfail": xfail,
+                "xpass": sorted(f for f in known_bad if f not in xfail),
+                "bytes": len(html.encode("utf-8")),
+                "fetches": fetches,
+                "total_ms": round(total * 1000, 2),
+                "parse_ms": {backend: round(seconds * 1000, 2) for backend, seconds in parse.items()},
+                "extract_ms": round(extract * 1000, 2),
+                "peak_kib": round(peak / 1024, 1),
+            })
+    finally:
+        server.shutdown()
+    return rows, manifest
+
+
+def _print_table(rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+    backends = list(rows[0]["parse_ms"])
+    parse_cols = "".join(f" {('parse ' + b):>17}" for b in backends)
+    print(f"Previews parsed with: {rows[0]['parser']}")
+    header = f"{'retailer':<10} {'ok':<4} {'KiB':>6} {'reqs':>4} {'total ms':>9}{parse_cols} {'extract ms':>10} {'peak KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        parse_vals = "".join(f" {r['parse_ms'][b]:>17.2f}" for b in backends)
+        print(
+            f"{r['retailer']:<10} {'yes' if r['ok'] else 'NO':<4} {r['bytes'] / 1024:>6.0f} {r['fetches']:>4} "
+            f"{r['total_ms']:>9.2f}{parse_vals} {r['extract_ms']:>10.2f} {r['peak_kib']:>9.1f}"
+        )
+        for field, diff in r["mismatches"].items():
+            print(f"    {field}: expected {diff['expected']!r}, got {diff['got']!r}")
+    xfail = [(r["retailer"], field, diff) for r in rows for field, diff in r["xfail"].items()]
+    if xfail:
+        print(f"Known bad (xfail, not counted as failures): {len(xfail)}")
+        for retailer, field, diff in xfail:
+            print(f"    {retailer}.{field}: expected {diff['expected']!r}, got {diff['got']!r} ({diff['reason']})")
+    xpass = [f"{r['retailer']}.{field}" for r in rows for field in r["xpass"]]
+    if xpass:
+        print(f"Known bad but now correct (remove from known_bad): {', '.join(xpass)}")
+    if len(backends) > 1:
+        totals = {b: sum(r["parse_ms"][b] for r in rows) for b in backends}
+        base = totals[backends[0]]
+        summary = ", ".join(f"{b} {totals[b]:.1f} ms ({base / totals[b]:.1f}x)" for b in backends if totals[b])
+        print(f"Parse time, all fixtures: {summary}")
+
+
+def manifest_diff(old: dict[str, dict[str, Any]], new: dict[str, dict[str, Any]]) -> list[str]:
+    """'retailer.field: old -> new' for every expected value --update would change."""
+    lines = []
+    for name, entry in new.items():
+        before = (old.get(name) or {}).get("expected") or {}
+        after = entry.get("expected") or {}
+        for field in COMPARED_FIELDS:
+            if before.get(field) != after.get(field):
+                lines.append(f"{name}.{field}: {before.get(field)!r} -> {after.get(field)!r}")
+    return lines
+
+
+def confirm_update(old: dict[str, dict[str, Any]], new: dict[str, dict[str, Any]], assume_yes: bool) -> bool:
+    """Print the expected-value diff and ask before overwriting the manifest."""
+    lines = manifest_diff(old, new)
+    if not lines:
+        print("Manifest unchanged: extraction matches every expected value.", file=sys.stderr)
+        return False
+    print("Proposed changes to expected values (check each is actually correct):", file=sys.stderr)
+    for line in lines:
+        print(f"    {line}", file=sys.stderr)
+    if assume_yes:
+        return True
+    if not sys.stdin.isatty():
+        print("Not writing the manifest: no terminal to confirm on (pass --yes to accept).", file=sys.stderr)
+        return False
+    return input(f"Write {len(lines)} change(s) to {MANIFEST_PATH.name}? [y/N] ").strip().lower() in ("y", "yes")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark product previews against the offline retailer fixtures.")
+    ap.add_argument("retailers", nargs="*", help="Only these manifest keys (default: all)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timed runs per retailer (median is reported)")
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    ap.add_argument(
+        "--update", action="store_true",
+        help="Propose current extraction results as the expected values (shows a diff and asks first)",
+    )
+    ap.add_argument("--yes", action="store_true", help="With --update, write the changes without asking")
+    ap.add_argument("--parser", choices=PARSER_BACKENDS, help="Parser backend for the previews (default: the app's choice)")
+    ap.add_argument("--verbose", action="store_true", help="Keep app warnings in the output")
+    args = ap.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    names = args.retailers or list(load_manifest())
+    unknown = [n for n in names if n not in load_manifest()]
+    if unknown:
+        print(f"Unknown retailer(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    if args.parser and args.parser not in available_parsers():
+        print(f"Parser backend not installed: {args.parser}", file=sys.stderr)
+        return 2
+    rows, manifest = bench(names, max(1, args.repeat), args.update, args.parser)
+    if args.update and confirm_update(load_manifest(), manifest, args.yes):
+        MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        _print_table(rows)
+    return 0 if all(r["ok"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
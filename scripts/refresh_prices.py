@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+CLI for price_refresh.PriceRefresher: re-check the prices of overdue unbought ha_products (repo root on sys.path).
+Uses the same Supabase env and product preview pipeline as the app; suitable for cron.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parents[1]
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import price_refresh  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Re-scrape prices of unbought products and record changes.")
+    ap.add_argument("--limit", type=int, default=20, help="Products to check this run (most overdue first)")
+    ap.add_argument("--min-age-hours", type=float, default=24, help="Skip products checked more recently than this")
+    ap.add_argument("--host-interval", type=float, default=20, help="Seconds between visits to the same retailer")
+    ap.add_argument("--dry-run", action="store_true", help="Scrape and report, but write nothing")
+    ap.add_argument("--pretty", action="store_true", help="Pretty-print JSON")
+    args = ap.parse_args()
+
+    import app as app_module
+
+    if app_module.supabase is None:
+        print("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)", file=sys.stderr)
+        return 1
+    refresher = price_refresh.PriceRefresher(
+        app_module.supabase,
+        app_module._fetch_product_preview,
+        host_interval=args.host_interval,
+        min_age=timedelta(hours=args.min_age_hours),
+    )
+    try:
+        summary = refresher.run(limit=max(1, args.limit), dry_run=args.dry_run)
+    except Exception as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(json.dumps(summary, indent=2 if args.pretty else None, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+-- Supabase/PostgreSQL table: ha_product_price_history
+-- Run this in the Supabase SQL Editor to create the table.
+-- Append-only log of price changes found by the price refresher (POST /api/products/refresh-prices,
+-- scripts/refresh_prices.py). ha_products.price always holds the latest price.
+
+create table if not exists ha_product_price_history (
+  id bigint generated by default as identity primary key,
+  product_id bigint not null references ha_products(id) on delete cascade,
+  price text,
+  previous_price text,
+  source text not null default 'refresh',
+  checked_at timestamptz not null default now()
+);
+
+comment on table ha_product_price_history is 'Price changes of ha_products over time (one row per change, never updated)';
+comment on column ha_product_price_history.previous_price is 'ha_products.price before this change';
+comment on column ha_product_price_history.source is 'What found the change: refresh (scheduled re-scrape)';
+
+create index if not exists idx_ha_product_price_history_product on ha_product_price_history (product_id, checked_at);
+
+-- Refresher state on ha_products: when the price was last checked, and the page validators
+-- (ETag / Last-Modified) for conditional requests.
+alter table ha_products add column if not exists price_checked_at timestamptz;
+alter table ha_products add column if not exists price_etag text;
+alter table ha_products add column if not exists price_last_modified text;
+
+comment on column ha_products.price_checked_at is 'Last time the price refresher checked this product';
+comment on column ha_products.price_etag is 'ETag of the product page at the last price check (If-None-Match)';
+comment on column ha_products.price_last_modified is 'Last-Modified of the product page at the last price check (If-Modified-Since)';
+
+create index if not exists idx_ha_products_price_checked_at on ha_products (price_checked_at nulls first) where not bought;
+
+notify pgrst, 'reload schema';
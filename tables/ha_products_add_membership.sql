@@ -0,0 +1,46 @@
+-- Project membership flags on ha_products, so the Muswell Hill and HK product pages are one indexed query
+-- (GET /api/muswell-hill-products, /api/hk-products) instead of filtering every product in Python.
+-- A trigger recomputes both on every insert and on every update of is_mwh, tags, project or category, with
+-- the rules of the app's _muswell_hill_product_match / _hk_product_match. It runs on the row being written, so
+-- concurrent edits cannot store flags derived from stale values. The update below backfills existing rows.
+-- Run in Supabase SQL Editor (safe to re-run). The get_muswell_hill_products RPC is no longer used.
+
+alter table ha_products add column if not exists in_mwh boolean not null default false;
+alter table ha_products add column if not exists in_hk boolean not null default false;
+
+comment on column ha_products.in_mwh is 'On the Muswell Hill page: is_mwh, tag mwh or project Muswell Hill (set by trigger ha_products_membership)';
+comment on column ha_products.in_hk is 'On the HK page: tag hk or category HK (set by trigger ha_products_membership)';
+
+create or replace function ha_products_set_membership()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.in_mwh := coalesce(new.is_mwh, false)
+    or exists (select 1 from unnest(coalesce(new.tags, '{}')) t where lower(trim(t)) = 'mwh')
+    or lower(trim(coalesce(new.project, ''))) = 'muswell hill';
+  new.in_hk := lower(trim(coalesce(new.category, ''))) = 'hk'
+    or exists (select 1 from unnest(coalesce(new.tags, '{}')) t where lower(trim(t)) = 'hk');
+  return new;
+end;
+$$;
+
+drop trigger if exists ha_products_membership on ha_products;
+create trigger ha_products_membership
+  before insert or update of is_mwh, tags, project, category on ha_products
+  for each row execute function ha_products_set_membership();
+
+update ha_products p
+set in_mwh = coalesce(p.is_mwh, false)
+      or exists (select 1 from unnest(coalesce(p.tags, '{}')) t where lower(trim(t)) = 'mwh')
+      or lower(trim(coalesce(p.project, ''))) = 'muswell hill',
+    in_hk = lower(trim(coalesce(p.category, ''))) = 'hk'
+      or exists (select 1 from unnest(coalesce(p.tags, '{}')) t where lower(trim(t)) = 'hk');
+
+-- Newest-first lists, optionally for one room (room_key from ha_products_add_room_key.sql).
+create index if not exists idx_ha_products_mwh on ha_products (room_key, created_at desc) where in_mwh;
+create index if not exists idx_ha_products_mwh_created on ha_products (created_at desc) where in_mwh;
+create index if not exists idx_ha_products_hk on ha_products (room_key, created_at desc) where in_hk;
+create index if not exists idx_ha_products_hk_created on ha_products (created_at desc) where in_hk;
+
+notify pgrst, 'reload schema';
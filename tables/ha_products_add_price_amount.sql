@@ -0,0 +1,18 @@
+-- Numeric price columns parsed from the free-text ha_products.price at write time, so lists can be
+-- sorted / filtered by price in the query (GET /api/products, /api/presents, /api/baby-products
+-- with sort=price, min_price=, max_price=). Run once in Supabase SQL Editor, then backfill existing
+-- rows with: python3 scripts/backfill_price_amounts.py
+
+alter table ha_products add column if not exists price_amount numeric(12, 2);
+alter table ha_products add column if not exists price_max numeric(12, 2);
+alter table ha_products add column if not exists currency text;
+
+comment on column ha_products.price_amount is 'Numeric price parsed from price (lower end of a range like "£12 – £30")';
+comment on column ha_products.price_max is 'Upper end of a price range, null for a single price';
+comment on column ha_products.currency is 'ISO code parsed from price (GBP when no symbol is given)';
+
+create index if not exists idx_ha_products_price_amount on ha_products (price_amount);
+create index if not exists idx_ha_products_present_price on ha_products (price_amount) where is_present;
+create index if not exists idx_ha_products_baby_price on ha_products (price_amount) where is_baby;
+
+notify pgrst, 'reload schema';
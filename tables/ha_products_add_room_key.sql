@@ -0,0 +1,33 @@
+-- Normalised room key on ha_products so room tabs (GET /api/products?room=) filter in the query with an
+-- indexed prefix match instead of fetching every product. room_key is room lower-cased with runs of
+-- other characters replaced by '-' ('Kitchen / Dining' -> 'kitchen-dining'); the app writes it with room.
+-- Run once in Supabase SQL Editor; the update below backfills existing rows.
+
+alter table ha_products add column if not exists room_key text;
+
+comment on column ha_products.room_key is 'Slug of room (''Bathroom 1'' -> ''bathroom-1''); room tabs match it by prefix';
+
+update ha_products
+set room_key = nullif(trim(both '-' from regexp_replace(lower(coalesce(room, '')), '[^a-z0-9]+', '-', 'g')), '')
+where room_key is distinct from nullif(trim(both '-' from regexp_replace(lower(coalesce(room, '')), '[^a-z0-9]+', '-', 'g')), '');
+
+-- text_pattern_ops lets `like 'bathroom%'` use the index.
+create index if not exists idx_ha_products_room_key on ha_products (room_key text_pattern_ops);
+
+-- Extra rooms a room tab includes: the Living Room tab (room_key living-room) also shows products whose
+-- room_key starts with front-room or kitchen. When this table is empty the app uses its built-in list.
+create table if not exists ha_room_aliases (
+  room_key text not null,
+  alias_key text not null,
+  created_at timestamptz not null default now(),
+  primary key (room_key, alias_key)
+);
+
+comment on table ha_room_aliases is 'Room tab (room_key) -> other room_key prefixes shown on that tab';
+
+insert into ha_room_aliases (room_key, alias_key) values
+  ('living-room', 'front-room'),
+  ('living-room', 'kitchen')
+on conflict do nothing;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,14 @@
+-- WebP thumbnails of ha_products.image_url, generated in the background when a product is saved
+-- (and by scripts/backfill_product_thumbs.py for existing rows). Product grids load thumb_small_url
+-- instead of the full-size retailer image while thumb_source_url still equals image_url.
+-- Run once in Supabase SQL Editor.
+
+alter table ha_products add column if not exists thumb_small_url text;
+alter table ha_products add column if not exists thumb_medium_url text;
+alter table ha_products add column if not exists thumb_source_url text;
+
+comment on column ha_products.thumb_small_url is 'Small WebP thumbnail (320px longest edge) of image_url, for grid tiles';
+comment on column ha_products.thumb_medium_url is 'Medium WebP thumbnail (640px longest edge) of image_url';
+comment on column ha_products.thumb_source_url is 'image_url the thumbnails were made from; stale when it differs';
+
+notify pgrst, 'reload schema';
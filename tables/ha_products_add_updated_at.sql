@@ -0,0 +1,30 @@
+-- Last-write timestamp on ha_products. Each app worker keeps an in-process snapshot of the table for the
+-- product list pages (PRODUCT_CACHE) and, before serving it, compares the table's row count and
+-- max(updated_at) with the snapshot's; a change made through another worker or a script shows on the next
+-- request. Run in Supabase SQL Editor (safe to re-run). Until it has been run the snapshot is reloaded on
+-- every request (correct, but no faster than not caching).
+
+alter table ha_products add column if not exists updated_at timestamptz not null default clock_timestamp();
+
+comment on column ha_products.updated_at is 'Time of the last insert / update (set by trigger ha_products_updated_at)';
+
+create or replace function ha_products_set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  -- clock_timestamp(), not now(): a long transaction must not stamp rows older than ones already committed.
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$;
+
+drop trigger if exists ha_products_updated_at on ha_products;
+create trigger ha_products_updated_at
+  before insert or update on ha_products
+  for each row execute function ha_products_set_updated_at();
+
+-- The freshness check reads the newest updated_at.
+create index if not exists idx_ha_products_updated_at on ha_products (updated_at desc);
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,118 @@
+"""
+Inverted tag index for ha_products: lower-cased tag -> product ids, with AND / OR / NOT tag queries and
+per-tag counts. product_cache.ProductCache keeps one next to its snapshot and patches it on every product
+write, so tag filters (GET /api/products?tag=, GET /api/products/tags) look tags up instead of scanning and
+string-matching every row. row_tags() is the one place that reads a row's tags.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Any, Iterable, Mapping
+
+# Separators / wrappers of tags stored as text ('{mwh,present}', "['mwh']", 'mwh, present').
+_TAG_TEXT_SPLIT_RE = re.compile(r"[,{}\[\]\"']+")
+
+
+def normalize_tag(tag: Any) -> str:
+    return str(tag).strip().lower()
+
+
+def row_tags(row: Mapping[str, Any]) -> frozenset[str]:
+    """Normalised tags of a product row; tags may be a list or (legacy) text."""
+    tags = row.get("tags")
+    if isinstance(tags, (list, tuple, set)):
+        values: Iterable[Any] = tags
+    elif tags:
+        values = _TAG_TEXT_SPLIT_RE.split(str(tags))
+    else:
+        values = ()
+    return frozenset(t for t in (normalize_tag(v) for v in values) if t)
+
+
+def _tag_list(raw: str | None) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(t for t in (normalize_tag(v) for v in (raw or "").split(",")) if t))
+
+
+class TagQuery:
+    """Products having every all_of tag, at least one any_of tag (when given) and no none_of tag."""
+
+    def __init__(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (), none_of: Iterable[str] = ()) -> None:
+        self.all_of = tuple(normalize_tag(t) for t in all_of if normalize_tag(t))
+        self.any_of = tuple(normalize_tag(t) for t in any_of if normalize_tag(t))
+        self.none_of = tuple(normalize_tag(t) for t in none_of if normalize_tag(t))
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "TagQuery":
+        """From ?all=a,b&any=c,d&not=e (comma-separated; tag= is an alias of all=)."""
+        all_of = _tag_list(args.get("all")) + _tag_list(args.get("tag"))
+        return cls(all_of=all_of, any_of=_tag_list(args.get("any")), none_of=_tag_list(args.get("not")))
+
+    def matches(self, tags: frozenset[str]) -> bool:
+        return (
+            all(t in tags for t in self.all_of)
+            and (not self.any_of or any(t in tags for t in self.any_of))
+            and not any(t in tags for t in self.none_of)
+        )
+
+    def to_dict(self) -> dict[str, list[str]]:
+        return {"all": list(self.all_of), "any": list(self.any_of), "not": list(self.none_of)}
+
+
+class TagIndex:
+    """tag -> set of product ids, plus id -> tags for counting. Not thread-safe: the owner locks."""
+
+    def __init__(self, rows: Iterable[Mapping[str, Any]] = ()) -> None:
+        self._ids: dict[str, set[Any]] = {}
+        self._tags: dict[Any, frozenset[str]] = {}
+        for row in rows:
+            self.set_row(row)
+
+    def __len__(self) -> int:
+        """Distinct tags in use."""
+        return len(self._ids)
+
+    def set_row(self, row: Mapping[str, Any]) -> None:
+        row_id = row.get("id")
+        if row_id is None:
+            return
+        self.remove(row_id)
+        tags = row_tags(row)
+        self._tags[row_id] = tags
+        for tag in tags:
+            self._ids.setdefault(tag, set()).add(row_id)
+
+    def remove(self, row_id: Any) -> None:
+        for tag in self._tags.pop(row_id, ()):
+            ids = self._ids.get(tag)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del self._ids[tag]
+
+    def ids(self, query: TagQuery) -> set[Any]:
+        """Ids of the products matching query (every product when the query is empty)."""
+        if query.all_of:
+            # Intersect from the rarest tag so the working set stays small.
+            sets = sorted((self._ids.get(t, set()) for t in query.all_of), key=len)
+            result = set(sets[0])
+            for ids in sets[1:]:
+                result &= ids
+            if query.any_of:
+                result = {i for i in result if any(i in self._ids.get(t, ()) for t in query.any_of)}
+        elif query.any_of:
+            result = set().union(*(self._ids.get(t, set()) for t in query.any_of))
+        else:
+            result = set(self._tags)
+        for tag in query.none_of:
+            result -= self._ids.get(tag, set())
+        return result
+
+    def counts(self, ids: Iterable[Any] | None = None) -> dict[str, int]:
+        """{tag: products} over ids (all products when None), most used first."""
+        if ids is None:
+            counts = Counter({tag: len(ids_) for tag, ids_ in self._ids.items()})
+        else:
+            counts = Counter(tag for i in ids for tag in self._tags.get(i, ()))
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))